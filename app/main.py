@@ -20,12 +20,13 @@
 
 import falcon
 
-from dogpile.cache import make_region
+from dogpile.cache import make_region, register_backend
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.settings import DB_CONNECTION, DEBUG, DOGPILE_CACHE_SETTINGS
+from app.settings import DB_CONNECTION, DEBUG, DOGPILE_CACHE_SETTINGS, DB_POOL_SIZE, DB_MAX_OVERFLOW, \
+    DB_POOL_RECYCLE
 
 from app.middleware.context import ContextMiddleware
 from app.middleware.sessionmanager import SQLAlchemySessionManager
@@ -35,18 +36,31 @@ from app.resources import polkascan
 
 
 # Database connection
-engine = create_engine(DB_CONNECTION, echo=DEBUG, isolation_level="READ_UNCOMMITTED", pool_pre_ping=True)
+engine = create_engine(
+    DB_CONNECTION,
+    echo=DEBUG,
+    isolation_level="READ_UNCOMMITTED",
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE
+)
 session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-# Define cache region
-cache_region = make_region().configure(
-            'dogpile.cache.redis',
+# Define cache region, redis backend that survives an expired distributed lock
+register_backend('app.redis', 'app.utils.cache', 'RedisBackend')
+
+cache_region = make_region(
+            key_mangler=lambda key: '{}:{}'.format(DOGPILE_CACHE_SETTINGS['key_prefix'], key)
+).configure(
+            'app.redis',
             arguments={
                 'host': DOGPILE_CACHE_SETTINGS['host'],
                 'port': DOGPILE_CACHE_SETTINGS['port'],
                 'db': DOGPILE_CACHE_SETTINGS['db'],
                 'redis_expiration_time': 60*60*2,   # 2 hours
-                'distributed_lock': True
+                'distributed_lock': True,
+                'lock_timeout': DOGPILE_CACHE_SETTINGS['lock_timeout']
             }
 )
 
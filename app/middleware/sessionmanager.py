@@ -25,10 +25,11 @@ class SQLAlchemySessionManager:
 
     def __init__(self, session_factory):
         self.session_factory = session_factory
+        # Single thread-local registry, so each request thread holds exactly one session and connection
+        self.session = scoped_session(self.session_factory)
 
     def process_resource(self, req, resp, resource, params):
-        resource.session = scoped_session(self.session_factory)
+        resource.session = self.session
 
     def process_response(self, req, resp, resource, req_succeeded):
-        if hasattr(resource, 'session'):
-            resource.session.remove()
+        self.session.remove()
@@ -17,6 +17,7 @@
 #  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
 #
 #  base.py
+import copy
 import decimal
 from datetime import datetime
 
@@ -36,12 +37,23 @@ class BaseModelObj(DictableModel):
         session.add(self)
         session.flush()
 
-    @property
-    def serialize_type(self):
-        return self.__class__.__name__.lower()
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Type defaults to the lowercase class name, available on the class for row serialization as well
+        if 'serialize_type' not in cls.__dict__:
+            cls.serialize_type = cls.__name__.lower()
+
+    @classmethod
+    def format_id(cls, item):
+        """ Id of a serialized object, shared by model instances and rows of column based queries
+        :param item: model instance or result row with the columns of the model
+        :returns: id of the object
+        """
+        return item.id
 
     def serialize_id(self):
-        return self.id
+        return self.format_id(self)
 
     def serialize_formatting_hook(self, obj_dict):
         """ Hook to be able to process data before being serialized """
@@ -53,23 +65,57 @@ class BaseModelObj(DictableModel):
         :returns: dict respresentation of current model
         """
 
+        attributes = self.asdict(exclude=exclude or self.serialize_exclude)
+
+        # Formatting hooks rewrite JSON values in place, copy them so the instance state stays untouched when the
+        # same instance is serialized more than once, e.g. when it is shared by several included relationships
+        for key, value in attributes.items():
+            if isinstance(value, (dict, list)):
+                attributes[key] = copy.deepcopy(value)
+
         obj_dict = {
             'type': self.serialize_type,
             'id': self.serialize_id(),
-            'attributes': self.asdict(exclude=exclude or self.serialize_exclude)
+            'attributes': attributes
         }
 
         obj_dict = self.serialize_formatting_hook(obj_dict)
 
-        # Reformat certain data type
-        for key, value in obj_dict['attributes'].items():
+        self.format_attributes(obj_dict['attributes'])
+
+        return obj_dict
+
+    @classmethod
+    def serialize_columns(cls):
+        """ Columns of the model table that are included in serialization, to be used in column based queries
+        :returns: list of table columns
+        """
+        return [column for column in cls.__table__.columns if column.name not in (cls.serialize_exclude or [])]
+
+    @classmethod
+    def serialize_row(cls, row):
+        """ Serializes a row of a column based query to a dict representation without constructing a model instance
+        :param row: result row containing the columns returned by serialize_columns()
+        :returns: dict respresentation of the row
+        """
+
+        return {
+            'type': cls.serialize_type,
+            'id': cls.format_id(row),
+            'attributes': cls.format_attributes(row._asdict())
+        }
+
+    @staticmethod
+    def format_attributes(attributes):
+        """ Reformat certain data types in serialized attributes """
+        for key, value in attributes.items():
             if type(value) is datetime:
-                obj_dict['attributes'][key] = value.replace(tzinfo=pytz.UTC).isoformat()
+                attributes[key] = value.replace(tzinfo=pytz.UTC).isoformat()
 
             if isinstance(value, decimal.Decimal):
-                obj_dict['attributes'][key] = float(value)
+                attributes[key] = float(value)
 
-        return obj_dict
+        return attributes
 
     @classmethod
     def query(cls, session):
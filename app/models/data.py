@@ -25,7 +25,8 @@ from sqlalchemy.dialects.mysql import LONGTEXT
 
 from app.models.base import BaseModel
 from app.utils.ss58 import ss58_encode, ss58_encode_account_index
-from app.settings import LOG_TYPE_AUTHORITIESCHANGE, SUBSTRATE_ADDRESS_TYPE, STR_MASK_LEN, STR_DID_LEN
+from app.utils.did import decode_did, mask_did
+from app.settings import LOG_TYPE_AUTHORITIESCHANGE, SUBSTRATE_ADDRESS_TYPE
 
 
 class Account(BaseModel):
@@ -77,8 +78,9 @@ class Account(BaseModel):
     created_at_block = sa.Column(sa.Integer(), nullable=False)
     updated_at_block = sa.Column(sa.Integer(), nullable=False)
 
-    def serialize_id(self):
-        return self.id
+    @classmethod
+    def format_id(cls, item):
+        return item.id
 
 
 class AccountAudit(BaseModel):
@@ -271,8 +273,9 @@ class Event(BaseModel):
 
     codec_error = sa.Column(sa.Boolean())
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.block_id, self.event_idx)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.block_id, item.event_idx)
 
     def serialize_formatting_hook(self, obj_dict):
 
@@ -321,6 +324,14 @@ class Event(BaseModel):
         return obj_dict
 
 
+class EventAccountRef(BaseModel):
+    __tablename__ = 'data_event_account_ref'
+
+    account_id = sa.Column(sa.String(66), primary_key=True)
+    block_id = sa.Column(sa.Integer(), primary_key=True)
+    event_idx = sa.Column(sa.Integer(), primary_key=True)
+
+
 class Extrinsic(BaseModel):
     __tablename__ = 'data_extrinsic'
 
@@ -340,7 +351,7 @@ class Extrinsic(BaseModel):
 
     address_length = sa.Column(sa.String(2))
     address = sa.Column(sa.String(64), index=True)
-    account = relationship(Account, foreign_keys=[address], primaryjoin=address == Account.id, lazy='subquery')
+    account = relationship(Account, foreign_keys=[address], primaryjoin=address == Account.id, lazy='selectin')
 
     account_index = sa.Column(sa.String(16), index=True)
     account_idx = sa.Column(sa.Integer(), index=True)
@@ -361,8 +372,9 @@ class Extrinsic(BaseModel):
 
     codec_error = sa.Column(sa.Boolean(), default=False)
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.block_id, self.extrinsic_idx)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.block_id, item.extrinsic_idx)
 
     def serialize_formatting_hook(self, obj_dict):
 
@@ -391,8 +403,7 @@ class Extrinsic(BaseModel):
                         self.format_address(proposal_param)
             # parse DID to show human readable DID in extrinsic details
             elif item['type'] == 'Did':
-                s = bytearray.fromhex(item['value'].replace('0x','')).decode()
-                item['value'] = s[:STR_MASK_LEN].ljust(STR_DID_LEN, "*")
+                item['value'] = mask_did(decode_did(item['value']))
 
         return obj_dict
 
@@ -406,8 +417,9 @@ class Log(BaseModel):
     type = sa.Column(sa.String(64))
     data = sa.Column(sa.JSON())
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.block_id, self.log_idx)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.block_id, item.log_idx)
 
     def serialize_formatting_hook(self, obj_dict):
 
@@ -465,7 +477,7 @@ class SessionValidator(BaseModel):
     session_id = sa.Column(sa.Integer(), primary_key=True, autoincrement=False)
     rank_validator = sa.Column(sa.Integer(), primary_key=True, autoincrement=False, index=True)
     validator_stash = sa.Column(sa.String(64), index=True)
-    validator_stash_account = relationship(Account, foreign_keys=[validator_stash], primaryjoin=validator_stash == Account.id, lazy='subquery')
+    validator_stash_account = relationship(Account, foreign_keys=[validator_stash], primaryjoin=validator_stash == Account.id, lazy='selectin')
     validator_controller = sa.Column(sa.String(64), index=True)
     validator_controller_account = relationship(Account, foreign_keys=[validator_controller],
                                            primaryjoin=validator_controller == Account.id)
@@ -479,8 +491,9 @@ class SessionValidator(BaseModel):
     unstake_threshold = sa.Column(sa.Integer(), nullable=True)
     commission = sa.Column(sa.Numeric(precision=65, scale=0), nullable=True)
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.session_id, self.rank_validator)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.session_id, item.rank_validator)
 
     def serialize_formatting_hook(self, obj_dict):
 
@@ -520,12 +533,13 @@ class SessionNominator(BaseModel):
     rank_nominator = sa.Column(sa.Integer(), primary_key=True, autoincrement=False, index=True)
     nominator_stash = sa.Column(sa.String(64), index=True)
     nominator_stash_account = relationship(Account, foreign_keys=[nominator_stash],
-                                           primaryjoin=nominator_stash == Account.id, lazy='subquery')
+                                           primaryjoin=nominator_stash == Account.id, lazy='selectin')
     nominator_controller = sa.Column(sa.String(64), index=True, nullable=True)
     bonded = sa.Column(sa.Numeric(precision=65, scale=0), nullable=False)
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.session_id, self.rank_validator, self.rank_nominator)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.session_id, item.rank_validator, item.rank_nominator)
 
     def serialize_formatting_hook(self, obj_dict):
 
@@ -561,8 +575,9 @@ class AccountIndex(BaseModel):
     created_at_block = sa.Column(sa.Integer(), nullable=False)
     updated_at_block = sa.Column(sa.Integer(), nullable=False)
 
-    def serialize_id(self):
-        return self.short_address
+    @classmethod
+    def format_id(cls, item):
+        return item.short_address
 
     def serialize_formatting_hook(self, obj_dict):
         obj_dict['attributes']['account_id'] = self.account_id
@@ -600,8 +615,9 @@ class Contract(BaseModel):
     created_at_extrinsic = sa.Column(sa.Integer())
     created_at_event = sa.Column(sa.Integer())
 
-    def serialize_id(self):
-        return self.code_hash
+    @classmethod
+    def format_id(cls, item):
+        return item.code_hash
 
 
 class Runtime(BaseModel):
@@ -625,8 +641,9 @@ class Runtime(BaseModel):
     count_constants = sa.Column(sa.Integer(), nullable=False, server_default='0')
     count_errors = sa.Column(sa.Integer(), nullable=False, server_default='0')
 
-    def serialize_id(self):
-        return self.spec_version
+    @classmethod
+    def format_id(cls, item):
+        return item.spec_version
 
 
 class RuntimeModule(BaseModel):
@@ -648,8 +665,9 @@ class RuntimeModule(BaseModel):
     count_constants = sa.Column(sa.Integer(), nullable=False, server_default='0')
     count_errors = sa.Column(sa.Integer(), nullable=False, server_default='0')
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.spec_version, self.module_id)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.spec_version, item.module_id)
 
 
 class RuntimeCall(BaseModel):
@@ -668,8 +686,9 @@ class RuntimeCall(BaseModel):
     documentation = sa.Column(sa.Text())
     count_params = sa.Column(sa.Integer(), nullable=False)
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.spec_version, self.module_id, self.call_id)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.spec_version, item.module_id, item.call_id)
 
 
 class RuntimeCallParam(BaseModel):
@@ -698,8 +717,9 @@ class RuntimeEvent(BaseModel):
     documentation = sa.Column(sa.Text())
     count_attributes = sa.Column(sa.Integer(), nullable=False)
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.spec_version, self.module_id, self.event_id)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.spec_version, item.module_id, item.event_id)
 
 
 class RuntimeEventAttribute(BaseModel):
@@ -732,8 +752,9 @@ class RuntimeStorage(BaseModel):
     type_key2hasher = sa.Column(sa.String(255))
     documentation = sa.Column(sa.Text())
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.spec_version, self.module_id, self.name)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.spec_version, item.module_id, item.name)
 
 
 class RuntimeConstant(BaseModel):
@@ -748,8 +769,9 @@ class RuntimeConstant(BaseModel):
     value = sa.Column(sa.String(255))
     documentation = sa.Column(sa.Text())
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.spec_version, self.module_id, self.name)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.spec_version, item.module_id, item.name)
 
 
 class RuntimeErrorMessage(BaseModel):
@@ -763,8 +785,9 @@ class RuntimeErrorMessage(BaseModel):
     name = sa.Column(sa.String(255), index=True)
     documentation = sa.Column(sa.Text())
 
-    def serialize_id(self):
-        return '{}-{}-{}'.format(self.spec_version, self.module_id, self.index)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}-{}'.format(item.spec_version, item.module_id, item.index)
 
 
 class RuntimeType(BaseModel):
@@ -778,8 +801,9 @@ class RuntimeType(BaseModel):
     is_primitive_runtime = sa.Column(sa.Boolean(), default=False)
     is_primitive_core = sa.Column(sa.Boolean(), default=False)
 
-    def serialize_id(self):
-        return '{}-{}'.format(self.spec_version, self.type_string)
+    @classmethod
+    def format_id(cls, item):
+        return '{}-{}'.format(item.spec_version, item.type_string)
 
 
 class IdentityJudgement(BaseModel):
@@ -17,16 +17,35 @@
 #  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
 #
 #  base.py
+import logging
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
 import falcon
 from dogpile.cache import CacheRegion
-from dogpile.cache.api import NO_VALUE
 from sqlalchemy.orm import Session
 from app.utils.jwt_validator import validateToken
 from app.models.base import BaseModel
 from app.settings import MAX_RESOURCE_PAGE_SIZE, DOGPILE_CACHE_SETTINGS
 
+logger = logging.getLogger(__name__)
+
+# Longer composite item ids are rejected before they reach the database
+MAX_ITEM_ID_LENGTH = 256
+
+
+# Detail ids are requested repeatedly, parsed ids are kept per process
+@lru_cache(maxsize=1024)
+def split_item_id(item_id, count):
+    """ Splits a composite item id, e.g. '<block_id>-<event_idx>', in its parts
+    :param item_id: item id from the url
+    :param count: number of parts the id consists of
+    :returns: tuple of parts, or None when the id is malformed
+    """
+    if not item_id or len(item_id) > MAX_ITEM_ID_LENGTH or item_id.count('-') != count - 1:
+        return None
+    return tuple(item_id.split('-'))
+
 
 class BaseResource(object):
 
@@ -89,6 +108,8 @@ class JSONAPIResource(BaseResource):
                 result['included'] = []
 
             for key, objects in relationships.items():
+                # Relationships can be queries, load them once for both the references and the included items
+                objects = list(objects)
                 result['data']['relationships'][key] = {'data': [{'type': obj.serialize_type, 'id': obj.serialize_id()} for obj in objects]}
                 result['included'] += [obj.serialize() for obj in objects]
 
@@ -100,22 +121,26 @@ class JSONAPIResource(BaseResource):
         if req.auth:
             auth = req.auth[len(auth)-5:]
         cache_key = '{}-{}-{}'.format(req.method, req.url, auth)
-        print("Called: 1")
         if self.cache_expiration_time:
-            # Try to retrieve request from cache
-            cache_response = self.cache_region.get(cache_key, self.cache_expiration_time)
-
-            if cache_response is not NO_VALUE:
+            processed = []
+
+            def process_response():
+                processed.append(True)
+                return self.process_get_response(req, resp, **kwargs)
+
+            # Try to retrieve request from cache, concurrent misses for the same key wait on the dogpile lock
+            # so only one of them processes the request
+            cache_response = self.cache_region.get_or_create(
+                cache_key,
+                process_response,
+                expiration_time=self.cache_expiration_time,
+                should_cache_fn=lambda response: response.get('cacheable')
+            )
+
+            if not processed:
                 resp.set_header('X-Cache', 'HIT')
-
-            else:
-                # Process request
-                cache_response = self.process_get_response(req, resp, **kwargs)
-
-                if cache_response.get('cacheable'):
-                    # Store result in cache
-                    self.cache_region.set(cache_key, cache_response)
-                    resp.set_header('X-Cache', 'MISS')
+            elif cache_response.get('cacheable'):
+                resp.set_header('X-Cache', 'MISS')
         else:
             cache_response = self.process_get_response(req, resp, **kwargs)
 
@@ -173,11 +198,10 @@ class JSONAPIDetailResource(JSONAPIResource, ABC):
         auth_user = False
         # print("auth: ",req.auth)
         tokenValidation = validateToken(req.auth)
-        print(tokenValidation)
+        logger.debug('Token validation result: %s', tokenValidation)
         if tokenValidation and 'did' in tokenValidation:
             auth_user = tokenValidation['did']
         item = self.get_item(kwargs.get(self.get_item_url_name()))
-        print("Called: 3")
         if not item:
             response = {
                 'status': falcon.HTTP_404,
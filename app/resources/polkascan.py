@@ -20,29 +20,144 @@
 from hashlib import blake2b
 
 import binascii
+import logging
+import threading
+from abc import ABC, abstractmethod
 
 import json
 import falcon
 import pytz
 import decimal
-from dogpile.cache.api import NO_VALUE
 from scalecodec.type_registry import load_type_registry_preset
-from sqlalchemy import func, tuple_, or_
-from sqlalchemy.orm import defer, subqueryload, lazyload, lazyload_all, Query
+from sqlalchemy import func, or_, and_, text, bindparam
+from sqlalchemy.ext import baked
+from sqlalchemy.types import JSON, DateTime
+from sqlalchemy.orm import defer, undefer, joinedload, subqueryload, lazyload, lazyload_all, Query
 
 from app import settings
 from app.models.data import Block, Extrinsic, Event, RuntimeCall, RuntimeEvent, Runtime, RuntimeModule, \
     RuntimeCallParam, RuntimeEventAttribute, RuntimeType, RuntimeStorage, Account, Session, Contract, \
     BlockTotal, SessionValidator, Log, AccountIndex, RuntimeConstant, SessionNominator, \
-    RuntimeErrorMessage, SearchIndex, AccountInfoSnapshot, Stats
-from app.resources.base import JSONAPIResource, JSONAPIListResource, JSONAPIDetailResource, BaseResource
+    RuntimeErrorMessage, SearchIndex, AccountInfoSnapshot, Stats, EventAccountRef, data_session
+from app.resources.base import JSONAPIResource, JSONAPIListResource, JSONAPIDetailResource, BaseResource, \
+    split_item_id
 from app.utils.ss58 import ss58_decode, ss58_encode
+from app.utils.did import remove_hex_prefix, hex_to_str, decode_did, decode_did_batch, mask_did
 from app.utils.jwt_validator import validateToken
 from scalecodec.base import RuntimeConfiguration
 from substrateinterface import SubstrateInterface
 
+logger = logging.getLogger(__name__)
+
 # 1 Billion
 METAMUI_TOTAL =  decimal.Decimal("1000000000")
+METAMUI_TOTAL_FLOAT = float(METAMUI_TOTAL)
+
+TOKEN_DECIMALS_DIVISOR = 10 ** settings.SUBSTRATE_TOKEN_DECIMALS
+
+LATEST_SPEC_VERSION_CACHE_EXPIRATION_TIME = 60
+
+# Size in hex characters of the chunks in which large extrinsic params are hashed
+PARAM_HASH_CHUNK_SIZE = 2 ** 20
+
+# Baked queries for the hot detail lookups, SQL compilation is cached after the first call
+bakery = baked.bakery()
+
+BLOCK_BY_HASH_QUERY = bakery(lambda session: session.query(Block))
+BLOCK_BY_HASH_QUERY += lambda q: q.filter(Block.hash == bindparam('block_hash'))
+
+BLOCK_ID_BY_HASH_QUERY = bakery(lambda session: session.query(Block.id))
+BLOCK_ID_BY_HASH_QUERY += lambda q: q.filter(Block.hash == bindparam('block_hash'))
+
+BLOCK_EXTRINSICS_QUERY = bakery(lambda session: session.query(Extrinsic))
+BLOCK_EXTRINSICS_QUERY += lambda q: q.filter(Extrinsic.block_id == bindparam('block_id')).order_by('extrinsic_idx')
+
+BLOCK_SIGNED_EXTRINSICS_QUERY = bakery(lambda session: session.query(Extrinsic).options(defer('params')))
+BLOCK_SIGNED_EXTRINSICS_QUERY += lambda q: q.filter(
+    Extrinsic.block_id == bindparam('block_id'), Extrinsic.signed == bindparam('signed')
+).order_by('extrinsic_idx')
+
+BLOCK_EVENTS_QUERY = bakery(lambda session: session.query(Event))
+BLOCK_EVENTS_QUERY += lambda q: q.filter(Event.block_id == bindparam('block_id')).order_by('event_idx')
+
+BLOCK_LOGS_QUERY = bakery(lambda session: session.query(Log))
+BLOCK_LOGS_QUERY += lambda q: q.filter(Log.block_id == bindparam('block_id')).order_by('log_idx')
+
+EXTRINSIC_BY_HASH_QUERY = bakery(lambda session: session.query(Extrinsic))
+EXTRINSIC_BY_HASH_QUERY += lambda q: q.filter(Extrinsic.extrinsic_hash == bindparam('extrinsic_hash'))
+
+RUNTIME_CALL_QUERY = bakery(lambda session: session.query(RuntimeCall))
+RUNTIME_CALL_QUERY += lambda q: q.filter(
+    RuntimeCall.spec_version == bindparam('spec_version'),
+    RuntimeCall.module_id == bindparam('module_id'),
+    RuntimeCall.call_id == bindparam('call_id')
+)
+
+RUNTIME_EVENT_QUERY = bakery(lambda session: session.query(RuntimeEvent))
+RUNTIME_EVENT_QUERY += lambda q: q.filter(
+    RuntimeEvent.spec_version == bindparam('spec_version'),
+    RuntimeEvent.module_id == bindparam('module_id'),
+    RuntimeEvent.event_id == bindparam('event_id')
+)
+
+RUNTIME_MODULE_QUERY = bakery(lambda session: session.query(RuntimeModule))
+RUNTIME_MODULE_QUERY += lambda q: q.filter(
+    RuntimeModule.spec_version == bindparam('spec_version'),
+    RuntimeModule.module_id == bindparam('module_id')
+)
+
+MODULE_CALLS_QUERY = bakery(lambda session: session.query(RuntimeCall))
+MODULE_CALLS_QUERY += lambda q: q.filter(
+    RuntimeCall.spec_version == bindparam('spec_version'),
+    RuntimeCall.module_id == bindparam('module_id')
+).order_by('lookup', 'id')
+
+MODULE_EVENTS_QUERY = bakery(lambda session: session.query(RuntimeEvent))
+MODULE_EVENTS_QUERY += lambda q: q.filter(
+    RuntimeEvent.spec_version == bindparam('spec_version'),
+    RuntimeEvent.module_id == bindparam('module_id')
+).order_by('lookup', 'id')
+
+MODULE_STORAGE_QUERY = bakery(lambda session: session.query(RuntimeStorage))
+MODULE_STORAGE_QUERY += lambda q: q.filter(
+    RuntimeStorage.spec_version == bindparam('spec_version'),
+    RuntimeStorage.module_id == bindparam('module_id')
+).order_by('name')
+
+MODULE_CONSTANTS_QUERY = bakery(lambda session: session.query(RuntimeConstant))
+MODULE_CONSTANTS_QUERY += lambda q: q.filter(
+    RuntimeConstant.spec_version == bindparam('spec_version'),
+    RuntimeConstant.module_id == bindparam('module_id')
+).order_by('name')
+
+MODULE_ERRORS_QUERY = bakery(lambda session: session.query(RuntimeErrorMessage))
+MODULE_ERRORS_QUERY += lambda q: q.filter(
+    RuntimeErrorMessage.spec_version == bindparam('spec_version'),
+    RuntimeErrorMessage.module_id == bindparam('module_id')
+).order_by('name', RuntimeErrorMessage.index)
+
+# Relationships of a runtime module detail by include name
+RUNTIME_MODULE_RELATIONSHIP_QUERIES = (
+    ('calls', MODULE_CALLS_QUERY),
+    ('events', MODULE_EVENTS_QUERY),
+    ('storage', MODULE_STORAGE_QUERY),
+    ('constants', MODULE_CONSTANTS_QUERY),
+    ('errors', MODULE_ERRORS_QUERY)
+)
+
+RUNTIME_STORAGE_QUERY = bakery(lambda session: session.query(RuntimeStorage))
+RUNTIME_STORAGE_QUERY += lambda q: q.filter(
+    RuntimeStorage.spec_version == bindparam('spec_version'),
+    RuntimeStorage.module_id == bindparam('module_id'),
+    RuntimeStorage.name == bindparam('name')
+)
+
+RUNTIME_CONSTANT_QUERY = bakery(lambda session: session.query(RuntimeConstant))
+RUNTIME_CONSTANT_QUERY += lambda q: q.filter(
+    RuntimeConstant.spec_version == bindparam('spec_version'),
+    RuntimeConstant.module_id == bindparam('module_id'),
+    RuntimeConstant.name == bindparam('name')
+)
 
 
 class BlockDetailsResource(JSONAPIDetailResource):
@@ -52,28 +167,29 @@ class BlockDetailsResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
         if item_id.isnumeric():
-            return Block.query(self.session).filter_by(id=item_id).first()
+            try:
+                return Block.query(self.session).get(int(item_id))
+            except ValueError:
+                # Numeric characters such as '½' are no block number
+                return None
         else:
-            return Block.query(self.session).filter_by(hash=item_id).first()
+            return BLOCK_BY_HASH_QUERY(self.session()).params(block_hash=item_id).first()
 
     def get_relationships(self, include_list, item):
         relationships = {}
 
         if 'extrinsics' in include_list:
-            relationships['extrinsics'] = Extrinsic.query(self.session).filter_by(block_id=item.id).order_by(
-                'extrinsic_idx')
+            relationships['extrinsics'] = BLOCK_EXTRINSICS_QUERY(self.session()).params(block_id=item.id).all()
         if 'transactions' in include_list:
-            relationships['transactions'] = Extrinsic.query(self.session).options(defer('params')).filter_by(block_id=item.id, signed=1).order_by(
-                'extrinsic_idx')
+            relationships['transactions'] = BLOCK_SIGNED_EXTRINSICS_QUERY(self.session()).params(
+                block_id=item.id, signed=1).all()
         if 'inherents' in include_list:
-            relationships['inherents'] = Extrinsic.query(self.session).options(defer('params')).filter_by(block_id=item.id, signed=0).order_by(
-                'extrinsic_idx')
+            relationships['inherents'] = BLOCK_SIGNED_EXTRINSICS_QUERY(self.session()).params(
+                block_id=item.id, signed=0).all()
         if 'events' in include_list:
-            relationships['events'] = Event.query(self.session).filter_by(block_id=item.id).order_by(
-                'event_idx')
+            relationships['events'] = BLOCK_EVENTS_QUERY(self.session()).params(block_id=item.id).all()
         if 'logs' in include_list:
-            relationships['logs'] = Log.query(self.session).filter_by(block_id=item.id).order_by(
-                'log_idx')
+            relationships['logs'] = BLOCK_LOGS_QUERY(self.session()).params(block_id=item.id).all()
 
         return relationships
 
@@ -81,10 +197,13 @@ class BlockDetailsResource(JSONAPIDetailResource):
 class BlockListResource(JSONAPIListResource):
 
     def get_query(self):
-        return Block.query(self.session).order_by(
+        return self.session.query(*Block.serialize_columns()).order_by(
             Block.id.desc()
         )
 
+    def serialize_item(self, item):
+        return Block.serialize_row(item)
+
 
 class BlockTotalDetailsResource(JSONAPIDetailResource):
 
@@ -92,7 +211,7 @@ class BlockTotalDetailsResource(JSONAPIDetailResource):
         if item_id.isnumeric():
             return BlockTotal.query(self.session).get(item_id)
         else:
-            block = Block.query(self.session).filter_by(hash=item_id).first()
+            block = BLOCK_ID_BY_HASH_QUERY(self.session()).params(block_hash=item_id).first()
             if block:
                 return BlockTotal.query(self.session).get(block.id)
 
@@ -125,7 +244,7 @@ class BlockTotalListResource(JSONAPIListResource):
     def apply_filters(self, query, params):
 
         if params.get('filter[author]'):
-            account_id =  bytearray.fromhex(params.get('filter[author]').replace('0x','')).decode()
+            account_id = hex_to_str(params.get('filter[author]'))
             # if len(params.get('filter[author]')) == 64:
             #     account_id = params.get('filter[author]')
             # else:
@@ -156,10 +275,7 @@ class ExtrinsicListResource(JSONAPIListResource):
         else:
             data = item.serialize()
 
-        # Add account as relationship
-        if item.account:
-            # data['relationships'] = {'account': {"type": "account", "id": item.account.id}}
-            data['attributes']['account'] = item.account.serialize()
+        # Account is added as attribute by the serialize formatting hook
         return data
 
     # def get_included_items(self, items):
@@ -171,7 +287,7 @@ class ExtrinsicListResource(JSONAPIListResource):
         if params.get('filter[address]'):
             
             # Since we are storing balance in DID, we need to parse hex to did
-            account_id = bytearray.fromhex(params.get('filter[address]').replace('0x','')).decode()
+            account_id = hex_to_str(params.get('filter[address]'))
             # if len(params.get('filter[address]')) == 64:
             #     account_id = params.get('filter[address]')
             # else:
@@ -186,16 +302,20 @@ class ExtrinsicListResource(JSONAPIListResource):
 
             self.exclude_params = False
 
+            # Params are serialized for search index results, load them with the rows instead of per item
+            query = query.options(undefer('params'))
+
             if type(params.get('filter[search_index]')) != list:
                 params['filter[search_index]'] = [params.get('filter[search_index]')]
 
-            search_index = SearchIndex.query(self.session).filter(
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.extrinsic_idx).filter(
                 SearchIndex.index_type_id.in_(params.get('filter[search_index]')),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
+            ).distinct().subquery()
 
-            query = query.filter(tuple_(Extrinsic.block_id, Extrinsic.extrinsic_idx).in_(
-                [[s.block_id, s.extrinsic_idx] for s in search_index]
+            query = query.join(search_index, and_(
+                Extrinsic.block_id == search_index.c.block_id,
+                Extrinsic.extrinsic_idx == search_index.c.extrinsic_idx
             ))
         else:
 
@@ -222,19 +342,32 @@ class ExtrinsicListResource(JSONAPIListResource):
 
 class ExtrinsicDetailResource(JSONAPIDetailResource):
 
+    extrinsic_details_query = text("""
+        SELECT b.datetime, te.attributes AS transfer_attributes, fe.attributes AS failed_attributes
+        FROM data_block AS b
+        LEFT JOIN data_event AS te
+            ON :is_transfer AND te.block_id = b.id AND te.extrinsic_idx = :extrinsic_idx AND te.event_id = 'Transfer'
+        LEFT JOIN data_event AS fe
+            ON :is_error AND fe.block_id = b.id AND fe.extrinsic_idx = :extrinsic_idx
+            AND fe.event_id = 'ExtrinsicFailed'
+        WHERE b.id = :block_id
+        LIMIT 1
+    """).columns(datetime=DateTime, transfer_attributes=JSON, failed_attributes=JSON)
+
     def get_item_url_name(self):
         return 'extrinsic_id'
 
     def get_item(self, item_id):
-        print("Called: 2")
         if item_id[0:2] == '0x':
-            extrinsic = Extrinsic.query(self.session).filter_by(extrinsic_hash=item_id[2:]).first()
+            extrinsic = EXTRINSIC_BY_HASH_QUERY(self.session()).params(extrinsic_hash=item_id[2:]).first()
         else:
 
-            if len(item_id.split('-')) != 2:
+            extrinsic_id = split_item_id(item_id, 2)
+
+            if not extrinsic_id:
                 return None
 
-            extrinsic = Extrinsic.query(self.session).get(item_id.split('-'))
+            extrinsic = Extrinsic.query(self.session).get(extrinsic_id)
 
         return extrinsic
 
@@ -249,6 +382,47 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
 
         return relationships
 
+    def get_runtime_call_documentation(self, spec_version, module_id, call_id):
+        # Runtime metadata is immutable per spec version, so results are cached without expiration
+
+        def get_documentation():
+            runtime_call = RuntimeCall.query(self.session).filter_by(
+                module_id=module_id,
+                call_id=call_id,
+                spec_version=spec_version
+            ).first()
+
+            return runtime_call.documentation if runtime_call else None
+
+        return self.cache_region.get_or_create(
+            'runtime-call-documentation-{}-{}-{}'.format(spec_version, module_id, call_id), get_documentation
+        )
+
+    def get_runtime_error_documentation(self, spec_version, module_index, index):
+
+        def get_documentation():
+            error = RuntimeErrorMessage.query(self.session).filter_by(
+                module_index=module_index,
+                index=index,
+                spec_version=spec_version
+            ).first()
+
+            return error.documentation if error else None
+
+        return self.cache_region.get_or_create(
+            'runtime-error-documentation-{}-{}-{}'.format(spec_version, module_index, index), get_documentation
+        )
+
+    def hash_hex_value(self, value):
+        # Decode and hash in chunks to keep peak memory bounded for large values
+        value_hash = blake2b(digest_size=32)
+        offset = 2 if value.startswith('0x') else 0
+
+        for chunk_start in range(offset, len(value), PARAM_HASH_CHUNK_SIZE):
+            value_hash.update(binascii.unhexlify(value[chunk_start:chunk_start + PARAM_HASH_CHUNK_SIZE]))
+
+        return value_hash.hexdigest()
+
     def check_params(self, params, identifier):
         for idx, param in enumerate(params):
 
@@ -262,10 +436,7 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
                         param['value']['call_args'] = self.check_params(param['value']['call_args'], identifier)
 
                     elif type(param['value']) is str and len(param['value']) > 200000:
-                        param['value'] = "{}/{}".format(
-                            identifier,
-                            blake2b(bytes.fromhex(param['value'].replace('0x', '')), digest_size=32).digest().hex()
-                        )
+                        param['value'] = "{}/{}".format(identifier, self.hash_hex_value(param['value']))
                         param["type"] = "DownloadableBytesHash"
                         param['valueRaw'] = ""
 
@@ -274,66 +445,52 @@ class ExtrinsicDetailResource(JSONAPIDetailResource):
     def serialize_item(self, item, auth=False):
         data = item.serialize()
 
-        runtime_call = RuntimeCall.query(self.session).filter_by(
-            module_id=item.module_id,
-            call_id=item.call_id,
-            spec_version=item.spec_version_id
-        ).first()
-
-        data['attributes']['documentation'] = runtime_call.documentation
+        # Retrieve block datetime, transfer event and failed event in a single round-trip, event joins are
+        # only evaluated when the extrinsic is a balance transfer or failed
+        block_datetime, transfer_attributes, failed_attributes = self.session.execute(
+            self.extrinsic_details_query, {
+                'block_id': item.block_id,
+                'extrinsic_idx': item.extrinsic_idx,
+                'is_transfer': item.module_id == 'balances',
+                'is_error': bool(item.error)
+            }
+        ).first() or (None, None, None)
 
-        block = Block.query(self.session).get(item.block_id)
+        data['attributes']['documentation'] = self.get_runtime_call_documentation(
+            item.spec_version_id, item.module_id, item.call_id
+        )
 
-        data['attributes']['datetime'] = block.datetime.replace(tzinfo=pytz.UTC).isoformat()
+        if block_datetime:
+            data['attributes']['datetime'] = block_datetime.replace(tzinfo=pytz.UTC).isoformat()
 
-        if item.account:
-            data['attributes']['account'] = item.account.serialize()
+        params = data['attributes'].get('params')
 
-        if item.params:
-            item.params = self.check_params(item.params, item.serialize_id())
+        if params:
+            params = data['attributes']['params'] = self.check_params(params, item.serialize_id())
 
-        if item.module_id == 'balances' and item.call_id=='transfer':
-            event_data = Event.query(self.session).filter_by(
-                block_id=item.block_id,
-                event_id='Transfer',
-                extrinsic_idx=item.extrinsic_idx
-            ).first()
-            if event_data:
-                print("transfer event data: ", event_data.attributes)
-                data['attributes']['event_params']= getFormattedTransferEvent(event_data.attributes, auth)
-        if item.module_id == 'balances' and item.call_id=='transfer_with_memo' and len(item.params) >= 2:
-            event_data = Event.query(self.session).filter_by(
-                block_id=item.block_id,
-                event_id='Transfer',
-                extrinsic_idx=item.extrinsic_idx
-            ).first()
-            if event_data:
-                print("transfer event data: ", event_data.attributes)
-                data['attributes']['event_params']= getFormattedTransferEvent(event_data.attributes, auth, item.params[2])
+        if item.module_id == 'balances' and transfer_attributes:
+            if item.call_id == 'transfer':
+                data['attributes']['event_params'] = getFormattedTransferEvent(transfer_attributes, auth)
+            elif item.call_id == 'transfer_with_memo' and len(params) >= 2:
+                data['attributes']['event_params'] = getFormattedTransferEvent(
+                    transfer_attributes, auth, params[2]
+                )
 
-        if item.error:
-            # Retrieve ExtrinsicFailed event
-            extrinsic_failed_event = Event.query(self.session).filter_by(
-                block_id=item.block_id,
-                event_id='ExtrinsicFailed'
-            ).first()
+        if item.error and failed_attributes:
+            error_value = failed_attributes[0]['value']
 
             # Retrieve runtime error
-            if extrinsic_failed_event:
-                if 'Module' in extrinsic_failed_event.attributes[0]['value']:
-
-                    error = RuntimeErrorMessage.query(self.session).filter_by(
-                        module_index=extrinsic_failed_event.attributes[0]['value']['Module']['index'],
-                        index=extrinsic_failed_event.attributes[0]['value']['Module']['error'],
-                        spec_version=item.spec_version_id
-                    ).first()
-
-                    if error:
-                        data['attributes']['error_message'] = error.documentation
-                elif 'BadOrigin' in extrinsic_failed_event.attributes[0]['value']:
-                    data['attributes']['error_message'] = 'Bad origin'
-                elif 'CannotLookup' in extrinsic_failed_event.attributes[0]['value']:
-                    data['attributes']['error_message'] = 'Cannot lookup'
+            if 'Module' in error_value:
+                error_documentation = self.get_runtime_error_documentation(
+                    item.spec_version_id, error_value['Module']['index'], error_value['Module']['error']
+                )
+
+                if error_documentation:
+                    data['attributes']['error_message'] = error_documentation
+            elif 'BadOrigin' in error_value:
+                data['attributes']['error_message'] = 'Bad origin'
+            elif 'CannotLookup' in error_value:
+                data['attributes']['error_message'] = 'Cannot lookup'
 
         return data
 
@@ -347,25 +504,20 @@ def getFormattedTransferEvent(event_attribs, auth_user, memo_param=False):
     receiver = ""
     amount = ""
     memo = ""
-    print("auth_user: ",auth_user)
-    for event in event_attribs:
-        if event['type'] == 'Did' and event_attribs.index(event) == 0:
-            # its a sender
-            sender = bytearray.fromhex(event['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            # sender = sender[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-        elif event['type'] == 'Did' and event_attribs.index(event) == 1:
-            # its receiver
-            receiver = bytearray.fromhex(event['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            # receiver = receiver[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-        elif event['type'] == 'Balance':
-            amount = event['value']
+    # Transfer event attributes are positional: sender did, receiver did, amount
+    if len(event_attribs) >= 3:
+        sender_attrib, receiver_attrib, amount_attrib = event_attribs[:3]
+        if sender_attrib['type'] == 'Did':
+            sender = decode_did(sender_attrib['value'])
+        if receiver_attrib['type'] == 'Did':
+            receiver = decode_did(receiver_attrib['value'])
+        if amount_attrib['type'] == 'Balance':
+            amount = amount_attrib['value']
     if memo_param:
-        print('Found memo!')
         memo = memo_param['value']
     if not auth_user or auth_user not in [sender, receiver]:
-        print('User not authenticated')
-        sender = sender[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-        receiver = receiver[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
+        sender = mask_did(sender)
+        receiver = mask_did(receiver)
     return {
         "sender": sender,
         "receiver": receiver,
@@ -379,10 +531,10 @@ class EventsListResource(JSONAPIListResource):
     def apply_filters(self, query, params):
 
         if params.get('filter[address]'):
-            print('EventsListResource: ', params.get('filter[address]'))
+            logger.debug('EventsListResource: %s', params.get('filter[address]'))
             
             # Since we are storing balance in DID, we need to parse hex to did
-            account_id = bytearray.fromhex(params.get('filter[address]').replace('0x','')).decode()
+            account_id = hex_to_str(params.get('filter[address]'))
                 # if len(params.get('filter[address]')) == 64:
                 #     account_id = params.get('filter[address]')
                 # else:
@@ -398,13 +550,14 @@ class EventsListResource(JSONAPIListResource):
             if type(params.get('filter[search_index]')) != list:
                 params['filter[search_index]'] = [params.get('filter[search_index]')]
 
-            search_index = SearchIndex.query(self.session).filter(
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.event_idx).filter(
                 SearchIndex.index_type_id.in_(params.get('filter[search_index]')),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
+            ).distinct().subquery()
 
-            query = query.filter(tuple_(Event.block_id, Event.event_idx).in_(
-                [[s.block_id, s.event_idx] for s in search_index]
+            query = query.join(search_index, and_(
+                Event.block_id == search_index.c.block_id,
+                Event.event_idx == search_index.c.event_idx
             ))
         else:
 
@@ -431,19 +584,10 @@ class EventDetailResource(JSONAPIDetailResource):
         return 'event_id'
 
     def get_item(self, item_id):
-        if len(item_id.split('-')) != 2:
+        event_id = split_item_id(item_id, 2)
+        if not event_id:
             return None
-        event_data = Event.query(self.session).get(item_id.split('-')) 
-        refactor_attribs = []
-        # Convert all Did type in events with human readable format
-        for attrib in event_data.attributes:
-            if attrib['type'] == 'Did':
-                attrib['value'] = bytearray.fromhex(attrib['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-                # Will decide on masking or not in serialization, based on auth status
-                # attrib['value'] = s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-            refactor_attribs.append(attrib)    
-        event_data.attributes = refactor_attribs;        
-        return event_data
+        return Event.query(self.session).get(event_id)
 
     def serialize_item(self, item, auth_user=False):
         data = item.serialize()
@@ -454,16 +598,23 @@ class EventDetailResource(JSONAPIDetailResource):
             spec_version=item.spec_version_id
         ).first()
 
+        # Convert all Did type in events with human readable format, on copies so the ORM row stays clean
+        attributes = [
+            dict(attrib, value=decode_did(attrib['value'])) if attrib['type'] == 'Did' else attrib
+            for attrib in data['attributes']['attributes']
+        ]
+
         # List all the did's which comes under this event
-        event_dids = [x['value'] for x in item.attributes if x['type'] == 'Did']
-        print(event_dids)
+        event_dids = [x['value'] for x in attributes if x['type'] == 'Did']
+        logger.debug('Event DIDs: %s', event_dids)
         # evaluate masking only if event has any DID 
         if event_dids:
             if not auth_user or auth_user not in event_dids:
-                print('User not authenticated')
-                for attrib in item.attributes:
+                logger.debug('User not authenticated')
+                for attrib in attributes:
                     if attrib['type'] == 'Did':
-                        attrib['value'] = attrib['value'][:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
+                        attrib['value'] = mask_did(attrib['value'])
+        data['attributes']['attributes'] = attributes
         data['attributes']['documentation'] = runtime_event.documentation
 
         return data
@@ -480,309 +631,312 @@ class LogListResource(JSONAPIListResource):
 class LogDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
-        if len(item_id.split('-')) != 2:
+        log_id = split_item_id(item_id, 2)
+        if not log_id:
             return None
-        return Log.query(self.session).get(item_id.split('-'))
+        return Log.query(self.session).get(log_id)
+
+class StatsSnapshotResource(JSONAPIResource, ABC):
+
+    cache_expiration_time = settings.DOGPILE_CACHE_SETTINGS['stats_cache_expiration_time']
+
+    def get_stats(self, currency_id):
+        """ Stats of given currency as dict, cached once for all stats endpoints
+        :param currency_id: id of the Stats row
+        :returns: dict of Stats columns or None if currency is unknown
+        """
 
-class StatsResource(JSONAPIResource):
+        def create_stats():
+            stats = Stats.query(self.session).get(currency_id)
+            return stats.asdict() if stats else None
 
-    cache_expiration_time = 6
+        return self.cache_region.get_or_create(
+            'stats-{}'.format(currency_id),
+            create_stats,
+            expiration_time=self.cache_expiration_time
+        )
 
-    def on_get(self, req, resp, currency_id='metamui'):
+    def on_get(self, req, resp, **kwargs):
         resp.status = falcon.HTTP_200
+        resp.media = self.get_stats_response(**kwargs)
 
-        # TODO make caching more generic for custom resources
+    @abstractmethod
+    def get_stats_response(self, **kwargs):
+        raise NotImplementedError()
 
-        cache_key = '{}-{}'.format(req.method, req.url)
 
-        response = self.cache_region.get(cache_key, self.cache_expiration_time)
+class StatsResource(StatsSnapshotResource):
 
-        if response is NO_VALUE:
-            print('metamui stats not exist in cache!')
-            # Temporary hack to get the network stats
-            # TODO: Fix BlockTotal saving to DB
-            stats = Stats.query(self.session).get(currency_id)
-            # print("best_block: ",best_block.id)
-            if stats:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'currency_stats',
-                        'id': currency_id,
-                        'attributes': {
-                            'currency_id': stats.id,
-                            'token_name': stats.token_name,
-                            'official_site': stats.site,
-                            'currency_decimals': stats.decimals,
-                            'current_circulation': stats.current_circulation,
-                            'total_supply': stats.total_supply
-                        }
-                    },
-                )
-            else:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'currency_stats',
-                        'id': currency_id,
-                        'attributes': {
-                            'currency_id': 'N/A',
-                            'token_name': 'N/A',
-                            'official_site': 'N/A',
-                            'currency_decimals': 'N/A',
-                            'current_circulation': 'N/A',
-                            'total_supply': 'N/A'
-                        }
-                    },
-                )
-            self.cache_region.set(cache_key, response)
-            resp.set_header('X-Cache', 'MISS')
+    def get_stats_response(self, currency_id='metamui'):
+        stats = self.get_stats(currency_id)
+
+        if stats:
+            attributes = {
+                'currency_id': stats['id'],
+                'token_name': stats['token_name'],
+                'official_site': stats['site'],
+                'currency_decimals': stats['decimals'],
+                'current_circulation': stats['current_circulation'],
+                'total_supply': stats['total_supply']
+            }
         else:
-            resp.set_header('X-Cache', 'HIT')
+            attributes = dict.fromkeys([
+                'currency_id', 'token_name', 'official_site', 'currency_decimals', 'current_circulation',
+                'total_supply'
+            ], 'N/A')
+
+        return self.get_jsonapi_response(
+            data={
+                'type': 'currency_stats',
+                'id': currency_id,
+                'attributes': attributes
+            },
+        )
 
-        resp.media = response
 
-class NetworkStatisticsResource(JSONAPIResource):
+class NetworkStatisticsResource(StatsSnapshotResource):
 
-    cache_expiration_time = 60
+    def get_stats_response(self, currency_id='metamui'):
+        stats = self.get_stats(currency_id)
 
-    def on_get(self, req, resp, currency_id='metamui'):
-        resp.status = falcon.HTTP_200
-        cache_key = '{}-{}'.format(req.method, req.url)
+        if stats:
+            attributes = {
+                'currency_id': stats['id'],
+                'currency_name': stats['token_name'],
+                'currency_symbol': stats['symbol'],
+                'official_site': stats['site'],
+                'currency_decimals': stats['decimals'],
+                'current_circulation': stats['current_circulation'],
+                'total_supply': stats['total_supply']
+            }
+        else:
+            attributes = dict.fromkeys([
+                'currency_id', 'currency_name', 'currency_symbol', 'official_site', 'currency_decimals',
+                'current_circulation', 'total_supply'
+            ], 'N/A')
+
+        return self.get_jsonapi_response(
+            data={
+                'type': 'currency_stats',
+                'id': currency_id,
+                'attributes': attributes
+            },
+        )
 
-        response = self.cache_region.get(cache_key, self.cache_expiration_time)
 
-        if response is NO_VALUE:
-            print('metamui stats not exist in cache!')
-            stats = Stats.query(self.session).get(currency_id)
-            if stats:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'currency_stats',
-                        'id': currency_id,
-                        'attributes': {
-                            'currency_id': stats.id,
-                            'currency_name': stats.token_name,
-                            'currency_symbol': stats.symbol,
-                            'official_site': stats.site,
-                            'currency_decimals': stats.decimals,
-                            'current_circulation': stats.current_circulation,
-                            'total_supply': stats.total_supply
-                        }
-                    },
-                )
-            else:
-                response = self.get_jsonapi_response(
-                    data={
-                        'type': 'currency_stats',
-                        'id': currency_id,
-                        'attributes': {
-                            'currency_id': 'N/A',
-                            'currency_name': 'N/A',
-                            'currency_symbol': 'N/A',
-                            'official_site': 'N/A',
-                            'currency_decimals': 'N/A',
-                            'current_circulation': 'N/A',
-                            'total_supply': 'N/A'
-                        }
-                    },
-                )
-            self.cache_region.set(cache_key, response)
-            resp.set_header('X-Cache', 'MISS')
-        else:
-            resp.set_header('X-Cache', 'HIT')
+class MetamuiStatisticsDetailResource(StatsSnapshotResource):
 
-        resp.media = response
+    def get_stats_response(self, field_id=None):
+        stats = self.get_stats('metamui')
 
-class MetamuiStatisticsDetailResource(JSONAPIResource):
+        if stats and field_id in ('total_supply', 'current_circulation'):
+            return stats[field_id]
 
-    cache_expiration_time = 60
+        return "Requested data not found"
+
+
+def format_transfer_event(attributes):
+    sender_id = remove_hex_prefix(attributes[0]['value'])
+    sender_data = {
+        'type': 'account',
+        'id': sender_id,
+        'attributes': {
+            'id': sender_id,
+            'address': mask_did(decode_did(sender_id))
+        }
+    }
+    destination_id = remove_hex_prefix(attributes[1]['value'])
+    destination_data = {
+        'type': 'account',
+        'id': destination_id,
+        'attributes': {
+            'id': destination_id,
+            'address': mask_did(decode_did(destination_id))
+        }
+    }
+    # Some networks don't have fees
+    if len(attributes) == 4:
+        fee = attributes[3]['value']
+    else:
+        fee = 0
+
+    return sender_data, destination_data, attributes[2]['value'], fee
+
+
+def format_claimed_event(attributes):
+    return {'name': 'Claim', 'eth_address': attributes[1]['value']}, {}, attributes[2]['value'], 0
+
+
+def format_deposit_event(attributes):
+    return {'name': 'Deposit'}, {}, attributes[1]['value'], 0
 
-    def on_get(self, req, resp, field_id=None):
-        resp.status = falcon.HTTP_200
-        cache_key = '{}-{}'.format(req.method, req.url)
-
-        response = self.cache_region.get(cache_key, self.cache_expiration_time)
-
-        if response is NO_VALUE:
-            print('metamui stats not exist in cache!')
-            stats = Stats.query(self.session).get('metamui')
-            if stats:
-                if field_id == 'total_supply':
-                    response = stats.total_supply
-                elif field_id == 'current_circulation':
-                    response = stats.current_circulation
-                else:
-                    response = "Requested data not found"
-            else:
-                response = "Requested data not found"
-            self.cache_region.set(cache_key, response)
-            resp.set_header('X-Cache', 'MISS')
-        else:
-            resp.set_header('X-Cache', 'HIT')
 
-        resp.media = response
+def format_reward_event(attributes):
+    return {'name': 'Staking reward'}, {}, attributes[1]['value'], 0
+
+
+def format_unknown_event(attributes):
+    return {}, {}, None, 0
+
+
+# Formatters of balance events by event_id, returning sender data, destination data, value and fee
+BALANCE_TRANSFER_EVENT_FORMATTERS = {
+    'Transfer': format_transfer_event,
+    'Claimed': format_claimed_event,
+    'Deposit': format_deposit_event,
+    'Reward': format_reward_event
+}
+
+
+def serialize_balance_transfer_event(item):
+    """
+    Serializes a balance event row, with at least block_id, extrinsic_idx, event_id and attributes, to a
+    balancetransfer resource
+    """
+    sender_data, destination_data, value, fee = BALANCE_TRANSFER_EVENT_FORMATTERS.get(
+        item.event_id, format_unknown_event
+    )(item.attributes)
+
+    return {
+        'type': 'balancetransfer',
+        'id': '{}-{}'.format(item.block_id, item.extrinsic_idx),
+        'attributes': {
+            'block_id': item.block_id,
+            'event_id': item.event_id,
+            'event_idx': '{}-{}'.format(item.block_id, item.extrinsic_idx),
+            'sender': sender_data,
+            'destination': destination_data,
+            'value': value,
+            'fee': fee
+        }
+    }
+
 
 class BalanceTransferHistoryListResource(JSONAPIListResource):
 
     def get_query(self):
-        return Event.query(self.session).filter(
+        return self.session.query(
+            Event.block_id, Event.extrinsic_idx, Event.event_id, Event.attributes
+        ).filter(
             Event.module_id == 'balances', Event.event_id == 'Transfer'
         ).order_by(Event.block_id.desc())
 
     def apply_filters(self, query, params):
-        print("query",query)
-        print("params",params)
         if params.get('filter[address]'):
-            print('BalanceTransferHistoryListResource: ', params.get('filter[address]'))
+            logger.debug('BalanceTransferHistoryListResource: %s', params.get('filter[address]'))
             if params.get('filter[address]')[0:2] == '0x':
                 # Raw DID
-                print('BalanceTransferHistory fetch by RAW DID')
+                logger.debug('BalanceTransferHistory fetch by RAW DID')
                 account_id = params.get('filter[address]')
             else:
                 # Convert text to hex & append with trailing 0's & hex prefix(0x)
-                print('BalanceTransferHistory fetch by DID')
+                logger.debug('BalanceTransferHistory fetch by DID')
                 account_id = '0x{:<064}'.format("".join("{:02x}".format(ord(c)) for c in params.get('filter[address]')))   
                 # Just to ensure that the DID is not exceeding the length of 32 bytes
                 account_id = account_id[:66] 
-            print('BalanceTransferHistoryListResource: account_id', account_id)
-            query = Event.query(self.session).filter(Event.attributes.contains([{"$[*].value":[account_id]}])==1).all().order_by(Event.block_id.desc())
-            # query = Query(Event).filter(Event.attributes.comparator.contains([account_id], '$[*].value'))
+            logger.debug('BalanceTransferHistoryListResource: account_id %s', account_id)
+            if settings.USE_EVENT_ACCOUNT_REF == 'True':
+                query = query.join(EventAccountRef, and_(
+                    EventAccountRef.block_id == Event.block_id,
+                    EventAccountRef.event_idx == Event.event_idx
+                )).filter(EventAccountRef.account_id == account_id)
+            else:
+                query = query.filter(
+                    func.json_contains(func.json_extract(Event.attributes, '$[*].value'), func.json_array(account_id))
+                )
 
         return query
 
     def serialize_item(self, item):
+        return serialize_balance_transfer_event(item)
 
-        if item.event_id == 'Transfer':
-            s = bytearray.fromhex(item.attributes[0]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            sender_data = {
-                'type': 'account',
-                'id': item.attributes[0]['value'].replace('0x', ''),
-                'attributes': {
-                    'id': item.attributes[0]['value'].replace('0x', ''),
-                    'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                    # 'address': ss58_encode(item.attributes[0]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
-                }
-            }
-            s = bytearray.fromhex(item.attributes[1]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            destination_data = {
-                'type': 'account',
-                'id': item.attributes[1]['value'].replace('0x', ''),
-                'attributes': {
-                    'id': item.attributes[1]['value'].replace('0x', ''),
-                    'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                    # 'address': ss58_encode(item.attributes[1]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
-                }
-            }
-            # Some networks don't have fees
-            if len(item.attributes) == 4:
-                fee = item.attributes[3]['value']
-            else:
-                fee = 0
-
-            value = item.attributes[2]['value']
-        elif item.event_id == 'Claimed':
 
-            fee = 0
-            sender_data = {'name': 'Claim', 'eth_address': item.attributes[1]['value']}
-            destination_data = {}
-            value = item.attributes[2]['value']
-
-        elif item.event_id == 'Deposit':
-
-            fee = 0
-            sender_data = {'name': 'Deposit'}
-            destination_data = {}
-            value = item.attributes[1]['value']
-
-        elif item.event_id == 'Reward':
-            fee = 0
-            sender_data = {'name': 'Staking reward'}
-            destination_data = {}
-            value = item.attributes[1]['value']
-        else:
-            sender_data = {}
-            fee = 0
-            destination_data = {}
-            value = None
-
-        return {
-            'type': 'balancetransfer',
-            'id': '{}-{}'.format(item.block_id, item.extrinsic_idx),
-            'attributes': {
-                'block_id': item.block_id,
-                'event_id': item.event_id,
-                'event_idx': '{}-{}'.format(item.block_id, item.extrinsic_idx),
-                'sender': sender_data,
-                'destination': destination_data,
-                'value': value,
-                'fee': fee
-            }
-        }
+# TODO: Temp hack. Need lot of refactoring 
+class BalanceTransferHistoryDetailResource(JSONAPIResource):
 
+    transfer_history_query = """
+        SELECT block_id, extrinsic_idx, attributes FROM data_event
+        WHERE module_id = 'balances' AND event_id = 'Transfer'
+        AND JSON_CONTAINS(attributes->'$[*].value', JSON_ARRAY(:account_id))
+        ORDER BY block_id DESC
+    """
 
+    # Index range seek on the account references populated by the harvester instead of a JSON scan
+    transfer_history_account_ref_query = """
+        SELECT e.block_id, e.extrinsic_idx, e.attributes FROM data_event AS e
+        INNER JOIN data_event_account_ref AS r ON r.block_id = e.block_id AND r.event_idx = e.event_idx
+        WHERE r.account_id = :account_id AND e.module_id = 'balances' AND e.event_id = 'Transfer'
+        ORDER BY r.block_id DESC
+    """
 
-# TODO: Temp hack. Need lot of refactoring 
-class BalanceTransferHistoryDetailResource(JSONAPIResource):
     def on_get(self, req, resp, did=None):
         transfer_data = [] 
         resp.status = falcon.HTTP_200
         auth_user = False
         # print("auth: ",req.auth)
         tokenValidation = validateToken(req.auth)
-        print(tokenValidation)
+        logger.debug('Token validation result: %s', tokenValidation)
         if tokenValidation and 'did' in tokenValidation:
             auth_user = tokenValidation['did']
         if did:
-            print('BalanceTransferHistoryListResource: ', did)
+            logger.debug('BalanceTransferHistoryDetailResource: %s', did)
             if did[0:2] == '0x':
                 # Raw DID
-                print('BalanceTransferHistory fetch by RAW DID')
+                logger.debug('BalanceTransferHistory fetch by RAW DID')
                 account_id = did
             else:
                 # Convert text to hex & append with trailing 0's & hex prefix(0x)
-                print('BalanceTransferHistory fetch by DID')
+                logger.debug('BalanceTransferHistory fetch by DID')
                 account_id = "0x{:<064}".format("".join("{:02x}".format(ord(c)) for c in did))  
                 # For lengthy DID's (Eg: XT's), convert to 32 byte size
                 account_id = account_id[:66]
-                print("raw_did",account_id)  
-            # query = Event.query(self.session).filter(func.json_contains({'attributes':[{'value':account_id}]})).all()
-            # query = self.session().query(Event).filter(Event.attributes.contains({'value': account_id}))
-            # query = Event.query(self.session).filter(func.json_contains(Event.attributes,json.dumps(account_id), "$[0].value")==1).all()
-            # query = self.session().query(Event).filter(func.json_contains(Event.attributes, json.dumps(account_id), "$[0].value")==1).all()
-            # query = Query(Event).filter(Event.attributes.comparator.contains([account_id]))
-            resultproxy = self.session.execute("SELECT * FROM %s.data_event WHERE module_id='balances' AND event_id='Transfer' AND JSON_CONTAINS(attributes->'$[*].value', json_array('%s')) ORDER BY block_id DESC"% (settings.DB_NAME, account_id))
-            event_results = [{column: value for column, value in rowproxy.items()} for rowproxy in resultproxy]
-            events = []
-            for r in event_results:
-                events.append(
-                    Event(
-                        block_id=r['block_id'],
-                        event_idx=r['event_idx'],
-                        phase=r['phase'],
-                        extrinsic_idx=r['extrinsic_idx'],
-                        type=r['type'],
-                        spec_version_id=r['spec_version_id'],
-                        module_id=r['module_id'],
-                        event_id=r['event_id'],
-                        system=r['system'],
-                        module=r['module'] ,
-                        attributes=json.loads(r['attributes']),
-                        codec_error=r['codec_error']
-                    )
+                logger.debug('raw_did %s', account_id)
+            query_params = {'account_id': account_id}
+
+            if settings.USE_EVENT_ACCOUNT_REF == 'True':
+                statement = self.transfer_history_account_ref_query
+            else:
+                statement = self.transfer_history_query
+
+            if req.params.get('page[size]'):
+                page = int(req.params.get('page[number]', 1)) - 1
+                page_size = min(int(req.params.get('page[size]')), settings.MAX_RESOURCE_PAGE_SIZE)
+                query_params.update({'limit': page_size, 'offset': page * page_size})
+                statement += 'LIMIT :limit OFFSET :offset'
+
+            # Only block_id, extrinsic_idx and attributes are used, read them straight from the result rows
+            events = [
+                (row['block_id'], row['extrinsic_idx'], row['attributes'])
+                for row in self.session.execute(text(statement).columns(attributes=JSON), query_params)
+            ]
+            # Retrieve datetimes of all blocks in the result in one query
+            block_datetimes = {
+                block_id: block_datetime.replace(tzinfo=pytz.UTC).isoformat()
+                for block_id, block_datetime in self.session.query(Block.id, Block.datetime).filter(
+                    Block.id.in_({event[0] for event in events})
                 )
-            for i in events:
-                sender = bytearray.fromhex(i.attributes[0]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-                reciever = bytearray.fromhex(i.attributes[1]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-                
-                if not auth_user or auth_user != did:
-                    print('User unauthenticated')
-                    sender = sender[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                    reciever = reciever[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                
+            } if events else {}
+
+            # Decode sender and receiver DIDs of the whole page up front
+            sender_ids = [remove_hex_prefix(event[2][0]['value']) for event in events]
+            reciever_ids = [remove_hex_prefix(event[2][1]['value']) for event in events]
+            senders = decode_did_batch(sender_ids)
+            recievers = decode_did_batch(reciever_ids)
+
+            # Masking only depends on the requested DID, so it is decided once for the whole page
+            if not auth_user or auth_user != did:
+                logger.debug('User unauthenticated')
+                senders = [mask_did(sender) for sender in senders]
+                recievers = [mask_did(reciever) for reciever in recievers]
+
+            for (block_id, extrinsic_idx, attributes), sender_id, reciever_id, sender, reciever in zip(
+                    events, sender_ids, reciever_ids, senders, recievers):
+
                 sender_data = {
                     'type': 'account',
-                    'id': i.attributes[0]['value'].replace('0x', ''),
+                    'id': sender_id,
                     'attributes': {
-                        'id': i.attributes[0]['value'].replace('0x', ''),
+                        'id': sender_id,
                         'address': sender
                         # 'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
                         # 'address': ss58_encode(item.attributes[0]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
@@ -790,9 +944,9 @@ class BalanceTransferHistoryDetailResource(JSONAPIResource):
                 }
                 destination_data = {
                     'type': 'account',
-                    'id': i.attributes[1]['value'].replace('0x', ''),
+                    'id': reciever_id,
                     'attributes': {
-                        'id': i.attributes[1]['value'].replace('0x', ''),
+                        'id': reciever_id,
                         'address': reciever
                         # 'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
                         # 'address': ss58_encode(item.attributes[1]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
@@ -800,27 +954,23 @@ class BalanceTransferHistoryDetailResource(JSONAPIResource):
                 }
 
                 # Some networks don't have fees
-                if len(i.attributes) == 4:
-                    fee = i.attributes[3]['value']
+                if len(attributes) == 4:
+                    fee = attributes[3]['value']
                 else:
                     fee = 0
-                block = Block.query(self.session).get(i.block_id)
                 transfer_data.append({
                     'type': 'balancetransfer',
-                    'id': '{}-{}'.format(i.block_id, i.extrinsic_idx),
+                    'id': '{}-{}'.format(block_id, extrinsic_idx),
                     'attributes': {
-                        'block_id': i.block_id,
-                        'datetime': block.datetime.replace(tzinfo=pytz.UTC).isoformat(),
-                        'event_idx': '{}-{}'.format(i.block_id, i.extrinsic_idx),
+                        'block_id': block_id,
+                        'datetime': block_datetimes.get(block_id),
+                        'event_idx': '{}-{}'.format(block_id, extrinsic_idx),
                         'sender': sender_data,
                         'destination': destination_data,
-                        'value': i.attributes[2]['value'],
+                        'value': attributes[2]['value'],
                         'fee': fee
                     }
                 })
-            response = self.get_jsonapi_response(
-                    data=transfer_data
-                )
             # hack for handling list of events 
             # print("returning resp", json.dumps(transfer_data))
             resp.body=json.dumps({
@@ -836,58 +986,32 @@ class BalanceTransferHistoryDetailResource(JSONAPIResource):
 class TopHoldersListResource(JSONAPIListResource):
     def get_query(self):
         transfer_data = [] 
-        query = """select
-    DISTINCT mt.params->"$[1].valueRaw" as did_hex,
-    mt.params->"$[0].valueRaw" as public_key_hex,
-    (SELECT MaxBlockId
-                                        FROM metascan.data_account_info_snapshot tt0
-                                            INNER JOIN
-                                                (SELECT account_id, MAX(block_id) AS MaxBlockId
-                                                FROM metascan.data_account_info_snapshot
-                                                GROUP BY account_id) groupedtt
-                                            ON tt0.account_id = groupedtt.account_id
-                                            AND tt0.block_id = groupedtt.MaxBlockId
-                                            where tt0.account_id = did_hex
-                                            ORDER BY tt0.balance_total Desc) as block_id,
-    (SELECT tt.balance_total
-                                        FROM metascan.data_account_info_snapshot tt
-                                            INNER JOIN
-                                                (SELECT account_id, MAX(block_id) AS MaxBlockId
-                                                FROM metascan.data_account_info_snapshot
-                                                GROUP BY account_id) groupedtt
-                                            ON tt.account_id = groupedtt.account_id
-                                            AND tt.block_id = groupedtt.MaxBlockId
-                                            where tt.account_id = did_hex
-                                            ORDER BY tt.balance_total Desc ) as total_balance,
-	(SELECT tt1.balance_free
-                                        FROM metascan.data_account_info_snapshot tt1
-                                            INNER JOIN
-                                                (SELECT account_id, MAX(block_id) AS MaxBlockId
-                                                FROM metascan.data_account_info_snapshot
-                                                GROUP BY account_id) groupedtt
-                                            ON tt1.account_id = groupedtt.account_id
-                                            AND tt1.block_id = groupedtt.MaxBlockId
-                                            where tt1.account_id = did_hex
-                                            ORDER BY tt1.balance_total Desc ) as balance_free,
-	(SELECT tt2.balance_reserved
-                                        FROM metascan.data_account_info_snapshot tt2
-                                            INNER JOIN
-                                                (SELECT account_id, MAX(block_id) AS MaxBlockId
-                                                FROM metascan.data_account_info_snapshot
-                                                GROUP BY account_id) groupedtt
-                                            ON tt2.account_id = groupedtt.account_id
-                                            AND tt2.block_id = groupedtt.MaxBlockId
-                                            where tt2.account_id = did_hex
-                                            ORDER BY tt2.balance_total Desc) as balance_reserved
-From metascan.data_extrinsic as mt
-WHERE mt.module_id='did' AND (mt.call_id = 'add' OR mt.call_id = 'rotate_key') order by total_balance DESC LIMIT 100"""
+        # Latest snapshot per account is picked with a window function in a single pass over the snapshots
+        query = """
+            SELECT d.did_hex, d.public_key, s.block_id, s.balance_total AS total_balance, s.balance_free,
+                s.balance_reserved
+            FROM (
+                SELECT DISTINCT
+                    params->>"$[1].valueRaw" AS did,
+                    params->"$[1].valueRaw" AS did_hex,
+                    params->>"$[0].valueRaw" AS public_key
+                FROM data_extrinsic
+                WHERE module_id = 'did' AND call_id IN ('add', 'rotate_key')
+            ) AS d
+            LEFT JOIN (
+                SELECT account_id, block_id, balance_total, balance_free, balance_reserved,
+                    ROW_NUMBER() OVER (PARTITION BY account_id ORDER BY block_id DESC) AS row_num
+                FROM data_account_info_snapshot
+            ) AS s ON s.account_id = d.did AND s.row_num = 1
+            ORDER BY total_balance DESC
+            LIMIT 100
+        """
         
             
-        resultproxy = self.session.execute(query)
-        results = [{column: value for column, value in rowproxy.items()} for rowproxy in resultproxy]
+        # Rows are unpacked positionally in serialize_item, no need to copy them into dicts
+        results = self.session.execute(query).fetchall()
         # sender = bytearray.fromhex(i.attributes[0]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
             
-        print(results)  
         return results
 
     def apply_paging(self, query, params):
@@ -896,15 +1020,16 @@ WHERE mt.module_id='did' AND (mt.call_id = 'add' OR mt.call_id = 'rotate_key') o
         return query[page * page_size: page * page_size + page_size]
 
     def serialize_item(self, item):       
-        # did = bytearray.fromhex(item['did_hex'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-        highest_balance = getHighestFormBalance(item['total_balance'])
+        did_hex, public_key, block_id, total_balance, balance_free, balance_reserved = item
+        # did = bytearray.fromhex(did_hex.replace('0x','')).decode().rstrip(' \t\r\n\0')
+        highest_balance = getHighestFormBalance(total_balance)
         return {
-            "block_id": item['block_id'],
+            "block_id": block_id,
             # "did": did,
-            "did": ss58_encode(str(json.loads(item["public_key_hex"]))),
+            "did": ss58_encode(public_key),
             "balance_total": str(highest_balance),
-            "balance_free": str(getHighestFormBalance(item['balance_free'])),
-            "balance_reserved": str(getHighestFormBalance(item['balance_reserved'])),
+            "balance_free": str(getHighestFormBalance(balance_free)),
+            "balance_reserved": str(getHighestFormBalance(balance_reserved)),
             "percentage": str(getPercentageBalance(highest_balance))
         }
 
@@ -912,21 +1037,25 @@ def getHighestFormBalance(balanceInDecimal):
     return 0 if (balanceInDecimal == 0 or balanceInDecimal == None) else round((balanceInDecimal / 1000000), 6)
 
 def getPercentageBalance(balanceInDecimal):
-    percentage_factor = decimal.Decimal("100")
-    return 0 if (balanceInDecimal == 0 or balanceInDecimal == None) else round(percentage_factor *(balanceInDecimal / METAMUI_TOTAL), 2)
+    # Two decimals as before the float math, e.g. '12.50'
+    return 0 if (balanceInDecimal == 0 or balanceInDecimal == None) else '{:.2f}'.format(100.0 * float(balanceInDecimal) / METAMUI_TOTAL_FLOAT)
 
 class BalanceTransferListResource(JSONAPIListResource):
 
     def get_query(self):
-        return Event.query(self.session).filter(
+        return self.session.query(*self.get_columns()).filter(
             Event.module_id == 'balances', Event.event_id == 'Transfer'
         ).order_by(Event.block_id.desc())
 
+    def get_columns(self):
+        # Only the columns read by serialize_balance_transfer_event
+        return Event.block_id, Event.extrinsic_idx, Event.event_id, Event.attributes
+
     def apply_filters(self, query, params):
         if params.get('filter[address]'):
-            print('BalanceTransferListResource: ', params.get('filter[address]'))
+            logger.debug('BalanceTransferListResource: %s', params.get('filter[address]'))
             # Since we are storing balance in DID, we need to parse hex to did
-            account_id = bytearray.fromhex(params.get('filter[address]').replace('0x','')).decode()
+            account_id = hex_to_str(params.get('filter[address]'))
             # if len(params.get('filter[address]')) == 64:
             #     account_id = params.get('filter[address]')
             # else:
@@ -935,7 +1064,7 @@ class BalanceTransferListResource(JSONAPIListResource):
             #     except ValueError:
             #         return query.filter(False)
 
-            search_index = SearchIndex.query(self.session).filter(
+            search_index = self.session.query(SearchIndex.block_id, SearchIndex.event_idx).filter(
                 SearchIndex.index_type_id.in_([
                     settings.SEARCH_INDEX_BALANCETRANSFER,
                     settings.SEARCH_INDEX_CLAIMS_CLAIMED,
@@ -943,101 +1072,27 @@ class BalanceTransferListResource(JSONAPIListResource):
                     settings.SEARCH_INDEX_STAKING_REWARD
                 ]),
                 SearchIndex.account_id == account_id
-            ).order_by(SearchIndex.sorting_value.desc())
+            ).distinct().subquery()
 
-            query = Event.query(self.session).filter(tuple_(Event.block_id, Event.event_idx).in_(
-                [[s.block_id, s.event_idx] for s in search_index]
+            query = self.session.query(*self.get_columns()).join(search_index, and_(
+                Event.block_id == search_index.c.block_id,
+                Event.event_idx == search_index.c.event_idx
             )).order_by(Event.block_id.desc())
 
 
         return query
 
     def serialize_item(self, item):
-
-        if item.event_id == 'Transfer':
-
-            # sender = Account.query(self.session).get(item.attributes[0]['value'].replace('0x', ''))
-
-            # if sender:
-            #     sender_data = sender.serialize()
-            # else:
-            s = bytearray.fromhex(item.attributes[0]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            sender_data = {
-                'type': 'account',
-                'id': item.attributes[0]['value'].replace('0x', ''),
-                'attributes': {
-                    'id': item.attributes[0]['value'].replace('0x', ''),
-                    'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                    # 'address': ss58_encode(item.attributes[0]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
-                }
-            }
-
-            # destination = Account.query(self.session).get(item.attributes[1]['value'].replace('0x', ''))
-
-            # if destination:
-            #     destination_data = destination.serialize()
-            # else:
-            s = bytearray.fromhex(item.attributes[1]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-            destination_data = {
-                'type': 'account',
-                'id': item.attributes[1]['value'].replace('0x', ''),
-                'attributes': {
-                    'id': item.attributes[1]['value'].replace('0x', ''),
-                    'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-                    # 'address': ss58_encode(item.attributes[1]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
-                }
-            }
-            # Some networks don't have fees
-            if len(item.attributes) == 4:
-                fee = item.attributes[3]['value']
-            else:
-                fee = 0
-
-            value = item.attributes[2]['value']
-        elif item.event_id == 'Claimed':
-
-            fee = 0
-            sender_data = {'name': 'Claim', 'eth_address': item.attributes[1]['value']}
-            destination_data = {}
-            value = item.attributes[2]['value']
-
-        elif item.event_id == 'Deposit':
-
-            fee = 0
-            sender_data = {'name': 'Deposit'}
-            destination_data = {}
-            value = item.attributes[1]['value']
-
-        elif item.event_id == 'Reward':
-            fee = 0
-            sender_data = {'name': 'Staking reward'}
-            destination_data = {}
-            value = item.attributes[1]['value']
-        else:
-            sender_data = {}
-            fee = 0
-            destination_data = {}
-            value = None
-
-        return {
-            'type': 'balancetransfer',
-            'id': '{}-{}'.format(item.block_id, item.extrinsic_idx),
-            'attributes': {
-                'block_id': item.block_id,
-                'event_id': item.event_id,
-                'event_idx': '{}-{}'.format(item.block_id, item.extrinsic_idx),
-                'sender': sender_data,
-                'destination': destination_data,
-                'value': value,
-                'fee': fee
-            }
-        }
+        return serialize_balance_transfer_event(item)
 
 
 class BalanceTransferDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
-        return Event.query(self.session).get(item_id.split('-'))
+        event_id = split_item_id(item_id, 2)
+        if not event_id:
+            return None
+        return Event.query(self.session).get(event_id)
 
     def serialize_item(self, item, auth_user=False):
 
@@ -1047,17 +1102,19 @@ class BalanceTransferDetailResource(JSONAPIDetailResource):
         #     sender_data = sender.serialize()
         # else:
         # TODO: Remove the hex did in id by removing its dependancies in explorer/ Metawallet App 
-        sender = bytearray.fromhex(item.attributes[0]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
-        receiver = bytearray.fromhex(item.attributes[1]['value'].replace('0x','')).decode().rstrip(' \t\r\n\0')
+        sender_id = remove_hex_prefix(item.attributes[0]['value'])
+        receiver_id = remove_hex_prefix(item.attributes[1]['value'])
+        sender = decode_did(sender_id)
+        receiver = decode_did(receiver_id)
         if not auth_user or auth_user not in [sender, receiver]:
-            print('User not authenticated')
-            sender = sender[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
-            receiver = receiver[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
+            logger.debug('User not authenticated')
+            sender = mask_did(sender)
+            receiver = mask_did(receiver)
         sender_data = {
             'type': 'account',
-            'id': item.attributes[0]['value'].replace('0x', ''),
+            'id': sender_id,
             'attributes': {
-                'id': item.attributes[0]['value'].replace('0x', ''),
+                'id': sender_id,
                 'address': sender
                 # 'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
                 # 'address': ss58_encode(item.attributes[0]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
@@ -1071,9 +1128,9 @@ class BalanceTransferDetailResource(JSONAPIDetailResource):
         # else:
         destination_data = {
             'type': 'account',
-            'id': item.attributes[1]['value'].replace('0x', ''),
+            'id': receiver_id,
             'attributes': {
-                'id': item.attributes[1]['value'].replace('0x', ''),
+                'id': receiver_id,
                 'address': receiver
                 # 'address': s[:settings.STR_MASK_LEN].ljust(settings.STR_DID_LEN, "*")
                 # 'address': ss58_encode(item.attributes[1]['value'].replace('0x', ''), settings.SUBSTRATE_ADDRESS_TYPE)
@@ -1163,10 +1220,41 @@ class AccountResource(JSONAPIListResource):
         return query
 
 
+def get_latest_spec_version(session, cache_region):
+    """ Spec version of the latest runtime, cached shortly as it only changes on runtime upgrades """
+
+    def get_spec_version():
+        return session.query(Runtime.spec_version).order_by(Runtime.spec_version.desc()).limit(1).scalar()
+
+    return cache_region.get_or_create(
+        'latest-spec-version',
+        get_spec_version,
+        expiration_time=LATEST_SPEC_VERSION_CACHE_EXPIRATION_TIME
+    )
+
+
+def latest_session_id_subquery(session):
+    """ Scalar subquery of the latest session id, to filter on the latest session within the same statement """
+    return session.query(func.max(data_session.c.id)).as_scalar()
+
+
+substrate_local = threading.local()
+
+
+def get_substrate():
+    """ SubstrateInterface of the current worker thread, created on first use and reused by later requests """
+    if not hasattr(substrate_local, 'substrate'):
+        substrate_local.substrate = SubstrateInterface(settings.SUBSTRATE_RPC_URL)
+    return substrate_local.substrate
+
+
 class AccountDetailResource(JSONAPIDetailResource):
 
     cache_expiration_time = 12
 
+    # Latest storage definitions only change on runtime upgrades
+    runtime_storage_cache_expiration_time = 300
+
     def __init__(self):
         RuntimeConfiguration().update_type_registry(load_type_registry_preset('default'))
         if settings.TYPE_REGISTRY != 'default':
@@ -1181,7 +1269,7 @@ class AccountDetailResource(JSONAPIDetailResource):
 
         if 'recent_extrinsics' in include_list:
             relationships['recent_extrinsics'] = Extrinsic.query(self.session).filter_by(
-                address=item.id).order_by(Extrinsic.block_id.desc())[:10]
+                address=item.id).order_by(Extrinsic.block_id.desc()).limit(10).all()
 
         if 'indices' in include_list:
             relationships['indices'] = AccountIndex.query(self.session).filter_by(
@@ -1189,28 +1277,46 @@ class AccountDetailResource(JSONAPIDetailResource):
 
         return relationships
 
+    def get_latest_runtime_storage(self, module_id, name):
+
+        def get_storage():
+            storage_call = RuntimeStorage.query(self.session).filter_by(
+                module_id=module_id,
+                name=name,
+            ).order_by(RuntimeStorage.spec_version.desc()).first()
+
+            return (storage_call.type_value, storage_call.type_hasher) if storage_call else None
+
+        return self.cache_region.get_or_create(
+            'runtime-storage-latest-{}-{}'.format(module_id, name),
+            get_storage,
+            expiration_time=self.runtime_storage_cache_expiration_time
+        )
+
     def serialize_item(self, item, auth_user=False):
         data = item.serialize()
 
         # Get balance history
-        account_info_snapshot = AccountInfoSnapshot.query(self.session).filter_by(
+        account_info_snapshot = self.session.query(
+            AccountInfoSnapshot.block_id, AccountInfoSnapshot.balance_total
+        ).filter_by(
                 account_id=item.id
-        ).order_by(AccountInfoSnapshot.block_id.desc())[:1000]
+        ).order_by(AccountInfoSnapshot.block_id.desc()).limit(1000).all()
 
         data['attributes']['balance_history'] = [
             {
                 'name': "Total balance",
                 'type': 'line',
                 'data': [
-                    [item.block_id, float((item.balance_total or 0) / 10**settings.SUBSTRATE_TOKEN_DECIMALS)]
-                    for item in reversed(account_info_snapshot)
+                    [block_id, float((balance_total or 0) / TOKEN_DECIMALS_DIVISOR)]
+                    for block_id, balance_total in reversed(account_info_snapshot)
                 ],
             }
         ]
 
         if settings.USE_NODE_RETRIEVE_BALANCES == 'True':
 
-            substrate = SubstrateInterface(settings.SUBSTRATE_RPC_URL)
+            substrate = get_substrate()
 
             # if settings.SUBSTRATE_STORAGE_BALANCE == 'Account':
             #     storage_call = RuntimeStorage.query(self.session).filter_by(
@@ -1261,20 +1367,18 @@ class AccountDetailResource(JSONAPIDetailResource):
             #             data['attributes']['fee_frozen_balance'] = account_data['feeFrozen']
             #             data['attributes']['nonce'] = None
             # elif settings.SUBSTRATE_STORAGE_BALANCE == 'Did.Account':
-            print('Did account type')
-            storage_call = RuntimeStorage.query(self.session).filter_by(
-                module_id='did',
-                name='Account',
-            ).order_by(RuntimeStorage.spec_version.desc()).first()
+            logger.debug('Did account type')
+            storage_call = self.get_latest_runtime_storage('did', 'Account')
 
             if storage_call:
+                type_value, type_hasher = storage_call
                 account_data = substrate.get_storage(
                     block_hash=None,
                     module='Did',
                     function='Account',
                     params=item.id,
-                    return_scale_type=storage_call.type_value,
-                    hasher=storage_call.type_hasher,
+                    return_scale_type=type_value,
+                    hasher=type_hasher,
                     metadata_version=settings.SUBSTRATE_METADATA_VERSION
                 )
 
@@ -1349,14 +1453,16 @@ class AccountIndexListResource(JSONAPIListResource):
 class AccountIndexDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
-        return AccountIndex.query(self.session).filter_by(short_address=item_id).first()
+        return AccountIndex.query(self.session).options(
+            joinedload(AccountIndex.account)
+        ).filter_by(short_address=item_id).first()
 
     def get_relationships(self, include_list, item):
         relationships = {}
 
         if 'recent_extrinsics' in include_list:
             relationships['recent_extrinsics'] = Extrinsic.query(self.session).filter_by(
-                address=item.account_id).order_by(Extrinsic.block_id.desc())[:10]
+                address=item.account_id).order_by(Extrinsic.block_id.desc()).limit(10).all()
 
         return relationships
 
@@ -1413,9 +1519,7 @@ class SessionValidatorListResource(JSONAPIListResource):
 
         if params.get('filter[latestSession]'):
 
-            session = Session.query(self.session).order_by(Session.id.desc()).first()
-
-            query = query.filter_by(session_id=session.id)
+            query = query.filter_by(session_id=latest_session_id_subquery(self.session))
 
         return query
 
@@ -1424,14 +1528,15 @@ class SessionValidatorDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 2:
+        item_id_parts = split_item_id(item_id, 2)
+
+        if not item_id_parts:
             return None
 
-        session_id, rank_validator = item_id.split('-')
-        return SessionValidator.query(self.session).filter_by(
-            session_id=session_id,
-            rank_validator=rank_validator
-        ).first()
+        return SessionValidator.query(self.session).options(
+            joinedload(SessionValidator.validator_stash_account),
+            joinedload(SessionValidator.validator_controller_account)
+        ).get(item_id_parts)
 
     def get_relationships(self, include_list, item):
         relationships = {}
@@ -1468,9 +1573,7 @@ class SessionNominatorListResource(JSONAPIListResource):
 
         if params.get('filter[latestSession]'):
 
-            session = Session.query(self.session).order_by(Session.id.desc()).first()
-
-            query = query.filter_by(session_id=session.id)
+            query = query.filter_by(session_id=latest_session_id_subquery(self.session))
 
         return query
 
@@ -1528,9 +1631,7 @@ class RuntimeCallListResource(JSONAPIListResource):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=get_latest_spec_version(self.session, self.cache_region))
 
         if params.get('filter[module_id]'):
 
@@ -1551,11 +1652,13 @@ class RuntimeCallDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 3:
+        item_id_parts = split_item_id(item_id, 3)
+
+        if not item_id_parts:
             return None
 
-        spec_version, module_id, call_id = item_id.split('-')
-        return RuntimeCall.query(self.session).filter_by(
+        spec_version, module_id, call_id = item_id_parts
+        return RUNTIME_CALL_QUERY(self.session()).params(
             spec_version=spec_version,
             module_id=module_id,
             call_id=call_id
@@ -1570,7 +1673,7 @@ class RuntimeCallDetailResource(JSONAPIDetailResource):
 
         if 'recent_extrinsics' in include_list:
             relationships['recent_extrinsics'] = Extrinsic.query(self.session).filter_by(
-                call_id=item.call_id, module_id=item.module_id).order_by(Extrinsic.block_id.desc())[:10]
+                call_id=item.call_id, module_id=item.module_id).order_by(Extrinsic.block_id.desc()).limit(10).all()
 
         return relationships
 
@@ -1583,21 +1686,30 @@ class RuntimeEventListResource(JSONAPIListResource):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=get_latest_spec_version(self.session, self.cache_region))
 
         if params.get('filter[module_id]'):
 
-            query = query.filter_by(module_id=params.get('filter[module_id]'))
+            # Several modules can be requested at once as a comma separated list, which Falcon may already split
+            module_ids = params.get('filter[module_id]')
+            if not isinstance(module_ids, list):
+                module_ids = module_ids.split(',')
+
+            if len(module_ids) > 1:
+                query = query.filter(RuntimeEvent.module_id.in_(module_ids))
+            else:
+                query = query.filter_by(module_id=module_ids[0])
 
         return query
 
     def get_query(self):
-        return RuntimeEvent.query(self.session).order_by(
+        return self.session.query(*RuntimeEvent.serialize_columns()).order_by(
             RuntimeEvent.spec_version.asc(), RuntimeEvent.module_id.asc(), RuntimeEvent.event_id.asc()
         )
 
+    def serialize_item(self, item):
+        return RuntimeEvent.serialize_row(item)
+
 
 class RuntimeEventDetailResource(JSONAPIDetailResource):
 
@@ -1606,11 +1718,13 @@ class RuntimeEventDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 3:
+        item_id_parts = split_item_id(item_id, 3)
+
+        if not item_id_parts:
             return None
 
-        spec_version, module_id, event_id = item_id.split('-')
-        return RuntimeEvent.query(self.session).filter_by(
+        spec_version, module_id, event_id = item_id_parts
+        return RUNTIME_EVENT_QUERY(self.session()).params(
             spec_version=spec_version,
             module_id=module_id,
             event_id=event_id
@@ -1625,7 +1739,7 @@ class RuntimeEventDetailResource(JSONAPIDetailResource):
 
         if 'recent_events' in include_list:
             relationships['recent_events'] = Event.query(self.session).filter_by(
-                event_id=item.event_id, module_id=item.module_id).order_by(Event.block_id.desc())[:10]
+                event_id=item.event_id, module_id=item.module_id).order_by(Event.block_id.desc()).limit(10).all()
 
         return relationships
 
@@ -1635,17 +1749,18 @@ class RuntimeTypeListResource(JSONAPIListResource):
     cache_expiration_time = 3600
 
     def get_query(self):
-        return RuntimeType.query(self.session).order_by(
-            'spec_version', 'type_string'
+        return self.session.query(*RuntimeType.serialize_columns()).order_by(
+            RuntimeType.spec_version, RuntimeType.type_string
         )
 
+    def serialize_item(self, item):
+        return RuntimeType.serialize_row(item)
+
     def apply_filters(self, query, params):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=get_latest_spec_version(self.session, self.cache_region))
 
         return query
 
@@ -1655,17 +1770,18 @@ class RuntimeModuleListResource(JSONAPIListResource):
     cache_expiration_time = 3600
 
     def get_query(self):
-        return RuntimeModule.query(self.session).order_by(
-            'spec_version', 'name'
+        return self.session.query(*RuntimeModule.serialize_columns()).order_by(
+            RuntimeModule.spec_version, RuntimeModule.name
         )
 
+    def serialize_item(self, item):
+        return RuntimeModule.serialize_row(item)
+
     def apply_filters(self, query, params):
 
         if params.get('filter[latestRuntime]'):
 
-            latest_runtime = Runtime.query(self.session).order_by(Runtime.spec_version.desc()).first()
-
-            query = query.filter_by(spec_version=latest_runtime.spec_version)
+            query = query.filter_by(spec_version=get_latest_spec_version(self.session, self.cache_region))
 
         return query
 
@@ -1674,39 +1790,22 @@ class RuntimeModuleDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 2:
+        item_id_parts = split_item_id(item_id, 2)
+
+        if not item_id_parts:
             return None
 
-        spec_version, module_id = item_id.split('-')
-        return RuntimeModule.query(self.session).filter_by(spec_version=spec_version, module_id=module_id).first()
+        spec_version, module_id = item_id_parts
+        return RUNTIME_MODULE_QUERY(self.session()).params(spec_version=spec_version, module_id=module_id).first()
 
     def get_relationships(self, include_list, item):
         relationships = {}
 
-        if 'calls' in include_list:
-            relationships['calls'] = RuntimeCall.query(self.session).filter_by(
-                spec_version=item.spec_version, module_id=item.module_id).order_by(
-                'lookup', 'id')
-
-        if 'events' in include_list:
-            relationships['events'] = RuntimeEvent.query(self.session).filter_by(
-                spec_version=item.spec_version, module_id=item.module_id).order_by(
-                'lookup', 'id')
-
-        if 'storage' in include_list:
-            relationships['storage'] = RuntimeStorage.query(self.session).filter_by(
-                spec_version=item.spec_version, module_id=item.module_id).order_by(
-                'name')
-
-        if 'constants' in include_list:
-            relationships['constants'] = RuntimeConstant.query(self.session).filter_by(
-                spec_version=item.spec_version, module_id=item.module_id).order_by(
-                'name')
-
-        if 'errors' in include_list:
-            relationships['errors'] = RuntimeErrorMessage.query(self.session).filter_by(
-                spec_version=item.spec_version, module_id=item.module_id).order_by(
-                'name').order_by(RuntimeErrorMessage.index)
+        for name, query in RUNTIME_MODULE_RELATIONSHIP_QUERIES:
+            if name in include_list:
+                relationships[name] = query(self.session()).params(
+                    spec_version=item.spec_version, module_id=item.module_id
+                ).all()
 
         return relationships
 
@@ -1715,11 +1814,13 @@ class RuntimeStorageDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 3:
+        item_id_parts = split_item_id(item_id, 3)
+
+        if not item_id_parts:
             return None
 
-        spec_version, module_id, name = item_id.split('-')
-        return RuntimeStorage.query(self.session).filter_by(
+        spec_version, module_id, name = item_id_parts
+        return RUNTIME_STORAGE_QUERY(self.session()).params(
             spec_version=spec_version,
             module_id=module_id,
             name=name
@@ -1731,20 +1832,25 @@ class RuntimeConstantListResource(JSONAPIListResource):
     cache_expiration_time = 3600
 
     def get_query(self):
-        return RuntimeConstant.query(self.session).order_by(
+        return self.session.query(*RuntimeConstant.serialize_columns()).order_by(
             RuntimeConstant.spec_version.desc(), RuntimeConstant.module_id.asc(), RuntimeConstant.name.asc()
         )
 
+    def serialize_item(self, item):
+        return RuntimeConstant.serialize_row(item)
+
 
 class RuntimeConstantDetailResource(JSONAPIDetailResource):
 
     def get_item(self, item_id):
 
-        if len(item_id.split('-')) != 3:
+        item_id_parts = split_item_id(item_id, 3)
+
+        if not item_id_parts:
             return None
 
-        spec_version, module_id, name = item_id.split('-')
-        return RuntimeConstant.query(self.session).filter_by(
+        spec_version, module_id, name = item_id_parts
+        return RUNTIME_CONSTANT_QUERY(self.session()).params(
             spec_version=spec_version,
             module_id=module_id,
             name=name
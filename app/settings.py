@@ -25,12 +25,17 @@ DB_PORT = os.environ.get("DB_PORT", 3306)
 DB_USERNAME = os.environ.get("DB_USERNAME", "root")
 DB_PASSWORD = os.environ.get("DB_PASSWORD", "root")
 VALIDATOR_KEY = os.environ.get("VALIDATOR_KEY", "secret").split(',')
+VALIDATOR_KEY_IDS = os.environ.get("VALIDATOR_KEY_IDS", "").split(',')
 VALIDATOR_ISSUER = os.environ.get("VALIDATOR_ISSUER", "did:ssid:blockchain").split(',')
 
 DB_CONNECTION = os.environ.get("DB_CONNECTION", "mysql+mysqlconnector://{}:{}@{}:{}/{}".format(
     DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 ))
 
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
 SUBSTRATE_RPC_URL = os.environ.get("SUBSTRATE_RPC_URL", "http://substrate-node:9933/")
 SUBSTRATE_ADDRESS_TYPE = int(os.environ.get("SUBSTRATE_ADDRESS_TYPE", 42))
 SUBSTRATE_TOKEN_DECIMALS = int(os.environ.get("SUBSTRATE_TOKEN_DECIMALS", 12))
@@ -43,9 +48,15 @@ DOGPILE_CACHE_SETTINGS = {
 
     'default_list_cache_expiration_time': 6,
     'default_detail_cache_expiration_time': 3600,
+    'stats_cache_expiration_time': int(os.environ.get("DOGPILE_CACHE_STATS_EXPIRATION_TIME", 60)),
     'host': os.environ.get("DOGPILE_CACHE_HOST", "redis"),
     'port': os.environ.get("DOGPILE_CACHE_PORT", 6379),
-    'db': os.environ.get("DOGPILE_CACHE_DB", 10)
+    'db': os.environ.get("DOGPILE_CACHE_DB", 10),
+    # Bump the version to invalidate all cached entries at once
+    'key_prefix': 'v{}'.format(os.environ.get("DOGPILE_CACHE_VERSION", 1)),
+    # Has to exceed the slowest cached request (top holders, account details with node calls), otherwise the lock
+    # expires while the value is created and concurrent requests create it again
+    'lock_timeout': int(os.environ.get("DOGPILE_CACHE_LOCK_TIMEOUT", 120))
 }
 
 
@@ -96,6 +107,7 @@ SEARCH_INDEX_SIGNED_EXTRINSIC = 99
 
 SUBSTRATE_STORAGE_BALANCE = os.environ.get("SUBSTRATE_STORAGE_BALANCE", "FreeBalance")
 USE_NODE_RETRIEVE_BALANCES = os.environ.get("USE_NODE_RETRIEVE_BALANCES", "False")
+USE_EVENT_ACCOUNT_REF = os.environ.get("USE_EVENT_ACCOUNT_REF", "False")
 
 try:
     from app.local_settings import *
@@ -0,0 +1,111 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  test_serialize.py
+
+import binascii
+from collections import namedtuple
+from hashlib import blake2b
+
+from app.models.data import Extrinsic, RuntimeConstant
+from app.resources.base import JSONAPIResource
+from app.resources.polkascan import ExtrinsicDetailResource
+from app.utils.did import mask_did
+
+DID = 'did:ssid:swn'
+DID_HEX = '0x' + binascii.hexlify(DID.encode().ljust(32, b'\0')).decode()
+
+
+def create_extrinsic():
+    return Extrinsic(
+        block_id=1,
+        extrinsic_idx=0,
+        params=[{'name': 'did', 'type': 'Did', 'value': DID_HEX}]
+    )
+
+
+def test_serialize_does_not_modify_instance():
+    extrinsic = create_extrinsic()
+
+    first = extrinsic.serialize()
+    second = extrinsic.serialize()
+
+    assert first == second
+    assert extrinsic.params[0]['value'] == DID_HEX
+
+
+def test_relationships_sharing_instances():
+    # Block includes such as extrinsics and transactions return the same instances from the identity map
+    extrinsic = create_extrinsic()
+
+    response = JSONAPIResource().get_jsonapi_response(
+        data={'type': 'block', 'id': 1, 'attributes': {}},
+        relationships={'extrinsics': [extrinsic], 'transactions': [extrinsic]}
+    )
+
+    assert len(response['included']) == 2
+    assert response['included'][0] == response['included'][1]
+    assert response['included'][0]['attributes']['params'][0]['value'] == mask_did(DID)
+
+
+class ExtrinsicSession(object):
+    """ Session without block, transfer or failed event rows for the extrinsic details query """
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def first(self):
+        return None
+
+
+class ExtrinsicDetailTestResource(ExtrinsicDetailResource):
+
+    session = ExtrinsicSession()
+
+    def get_runtime_call_documentation(self, spec_version, module_id, call_id):
+        return None
+
+
+def test_extrinsic_detail_hashes_large_params():
+    value = '0x' + '00' * 150000
+    extrinsic = Extrinsic(
+        block_id=1,
+        extrinsic_idx=0,
+        module_id='system',
+        call_id='remark',
+        error=0,
+        params=[{'name': 'remark', 'type': 'Bytes', 'value': value, 'valueRaw': value}]
+    )
+
+    data = ExtrinsicDetailTestResource().serialize_item(extrinsic)
+    param = data['attributes']['params'][0]
+
+    assert param['type'] == 'DownloadableBytesHash'
+    assert param['value'] == '1-0/{}'.format(blake2b(b'\0' * 150000, digest_size=32).hexdigest())
+    assert param['valueRaw'] == ''
+    assert extrinsic.params[0]['value'] == value
+
+
+def test_serialize_row_matches_instance():
+    values = {'spec_version': 1, 'module_id': 'balances', 'name': 'ExistentialDeposit'}
+    row = namedtuple('Row', values.keys())(**values)
+
+    serialized = RuntimeConstant.serialize_row(row)
+
+    assert serialized['type'] == 'runtimeconstant'
+    assert serialized['id'] == RuntimeConstant(**values).serialize_id()
@@ -0,0 +1,55 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  cache.py
+
+import logging
+
+from dogpile.cache.backends.redis import RedisBackend as DogpileRedisBackend
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLock(object):
+    """ Distributed lock of a cache key that logs a failed release instead of failing the request, e.g. when the
+    lock expired while the value was created """
+
+    def __init__(self, lock, key):
+        self.lock = lock
+        self.key = key
+
+    def acquire(self, wait=True):
+        return self.lock.acquire(blocking=wait)
+
+    def release(self):
+        try:
+            self.lock.release()
+        except LockError:
+            logger.warning('Cache lock of key %s expired before it was released', self.key)
+
+
+class RedisBackend(DogpileRedisBackend):
+
+    def get_mutex(self, key):
+        mutex = super(RedisBackend, self).get_mutex(key)
+
+        if mutex is None:
+            return None
+
+        return RedisLock(mutex, key)
@@ -0,0 +1,73 @@
+#  Polkascan PRE Explorer API
+#
+#  Copyright 2018-2020 openAware BV (NL).
+#  This file is part of Polkascan.
+#
+#  Polkascan is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Polkascan is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Polkascan. If not, see <http://www.gnu.org/licenses/>.
+#
+#  did.py
+
+import binascii
+
+from app.settings import STR_MASK_LEN, STR_DID_LEN
+
+# Characters a decoded DID is padded with to fill its fixed byte length
+DID_PADDING = ' \t\r\n\0'
+
+# Masked part of a DID that is at least STR_MASK_LEN characters long
+DID_MASK_TAIL = '*' * (STR_DID_LEN - STR_MASK_LEN)
+
+
+def remove_hex_prefix(value):
+    return value[2:] if value.startswith('0x') else value
+
+
+def hex_to_str(value):
+    """ Decodes a hex string, with or without 0x prefix, to text """
+    return binascii.unhexlify(remove_hex_prefix(value)).decode()
+
+
+def decode_did(value):
+    """ Decodes a hex encoded DID, with or without 0x prefix, to its human readable form without padding """
+    return hex_to_str(value).rstrip(DID_PADDING)
+
+
+def mask_did(did):
+    """ Masks a human readable DID to STR_DID_LEN characters, only the first STR_MASK_LEN stay visible """
+    if len(did) >= STR_MASK_LEN:
+        return did[:STR_MASK_LEN] + DID_MASK_TAIL
+    return did.ljust(STR_DID_LEN, '*')
+
+
+def decode_did_batch(values):
+    """ Decodes a list of hex encoded DIDs with a single unhexlify over their concatenation
+    :param values: list of hex encoded DIDs, with or without 0x prefix
+    :returns: list of human readable DIDs without padding, in the same order
+    """
+    hex_values = [remove_hex_prefix(value) for value in values]
+
+    for hex_value in hex_values:
+        if len(hex_value) % 2:
+            raise binascii.Error('Odd-length string')
+
+    data = binascii.unhexlify(''.join(hex_values))
+
+    dids = []
+    offset = 0
+    for hex_value in hex_values:
+        end = offset + len(hex_value) // 2
+        dids.append(data[offset:end].decode().rstrip(DID_PADDING))
+        offset = end
+
+    return dids
@@ -1,30 +1,110 @@
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+
 import jwt
-from app.settings import VALIDATOR_KEY, VALIDATOR_ISSUER 
+from jwt.utils import base64url_decode
+from app.settings import VALIDATOR_KEY, VALIDATOR_KEY_IDS, VALIDATOR_ISSUER
+
+logger = logging.getLogger(__name__)
+
+# Validation results are cached per token digest, at most this many seconds and never past the token expiry
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAX_SIZE = 4096
+
+token_cache = {}
+token_cache_lock = threading.Lock()
+
+# Configured signing keys, a single key may be given as a plain string
+VALIDATOR_KEYS = [VALIDATOR_KEY] if isinstance(VALIDATOR_KEY, str) else list(VALIDATOR_KEY)
+
+# Optional 'kid' header value per key, in the same order as the keys
+VALIDATOR_KEY_BY_KID = {kid: key for kid, key in zip(VALIDATOR_KEY_IDS, VALIDATOR_KEYS) if kid}
+
+# HMAC state per key with the key already absorbed, copied for every signature check
+VALIDATOR_HMACS = {key: hmac.new(key.encode('utf-8'), digestmod=hashlib.sha256) for key in VALIDATOR_KEYS}
+
+# Accepted issuers, a set for constant time membership checks
+ISSUERS = frozenset([VALIDATOR_ISSUER] if isinstance(VALIDATOR_ISSUER, str) else VALIDATOR_ISSUER)
 
 
 def validateToken(token):
+    if not token:
+        logger.debug('No token')
+        return False
+
+    now = time.time()
+    cache_key = hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+    with token_cache_lock:
+        cached = token_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    token_data = decodeToken(token)
+
+    expires_at = now + TOKEN_CACHE_TTL
+    if token_data:
+        expires_at = min(expires_at, token_data['exp'])
+
+    # PyJWT only verifies a single issuer, multiple accepted issuers are checked here
+    if token_data and token_data['iss'] in ISSUERS:
+        result = token_data['data']
+    else:
+        logger.debug('Token issuer is invalid')
+        result = False
+
+    with token_cache_lock:
+        if len(token_cache) >= TOKEN_CACHE_MAX_SIZE:
+            token_cache.clear()
+        token_cache[cache_key] = (expires_at, result)
+
+    return result
+
+
+def findValidator(token):
+    # Split and decode the token once, then only run the HMAC per configured key
     try:
-        if not token:
-            print('No token')
+        signing_input, signature = token.encode('utf-8').rsplit(b'.', 1)
+        signature = base64url_decode(signature)
+        header = json.loads(base64url_decode(signing_input.split(b'.', 1)[0]).decode('utf-8'))
+    except (ValueError, binascii.Error):
+        return None
+
+    candidates = VALIDATOR_KEYS
+    kid = header.get('kid') if isinstance(header, dict) else None
+    if isinstance(kid, str) and kid in VALIDATOR_KEY_BY_KID:
+        candidates = [VALIDATOR_KEY_BY_KID[kid]]
+
+    for validator in candidates:
+        mac = VALIDATOR_HMACS[validator].copy()
+        mac.update(signing_input)
+        if hmac.compare_digest(mac.digest(), signature):
+            return validator
+
+    return None
+
+
+def decodeToken(token):
+    try:
+        if not VALIDATOR_KEYS:
+            logger.debug('No Validator is configured, cant validate the token')
             return False
-        print(token)
-        if not VALIDATOR_KEY:
-            print('No Validator is configured, cant validate the token')
+
+        validator = findValidator(token)
+        if validator is None:
+            logger.debug("Not signed by any validator")
             return False
-        token_data = False
-        for validator in VALIDATOR_KEY:
-            try:
-                token_data = token_data = jwt.decode(token, validator, algorithms="HS256")
-                break
-            except jwt.InvalidSignatureError as e:
-                print("Not signed by this validator")
-                continue 
-        # token_data = jwt.decode(token, VALIDATOR_KEY, algorithms="HS256")
-        print(token_data)
-        if token_data and 'iss' in token_data and token_data['iss'] in VALIDATOR_ISSUER:
-            return token_data['data']
-        print('Token issuer is invalid')
-        return False
+
+        # Full decode (header, claims, expiry) only for the matching key
+        token_data = jwt.decode(token, validator, algorithms=['HS256'], options={'require': ['exp', 'iss']})
+        return token_data
     except jwt.ExpiredSignatureError:
-        print("Token expired")
+        logger.debug("Token expired")
+        return False
+    except jwt.InvalidTokenError:
+        logger.debug("Token is invalid")
         return False